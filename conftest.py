@@ -0,0 +1,13 @@
+"""
+Shared pytest fixtures for the GLEIF tool tests.
+"""
+
+import pytest
+
+from gleif_search import GLEIFSearcher
+
+
+@pytest.fixture(scope="session")
+def default_searcher():
+    """Default-configured searcher shared by every read-only test in the run."""
+    return GLEIFSearcher()
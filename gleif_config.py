@@ -4,6 +4,10 @@ Configuration for GLEIF API clients.
 Centralizes magic numbers and constants for easier maintenance.
 """
 
+# HTTP status codes treated as transient and retried; only used for
+# membership tests, so kept as an immutable module-level constant
+RATE_LIMIT_CODES = frozenset({429, 500, 502, 503, 504})
+
 
 class APIConfig:
     """API configuration constants."""
@@ -13,23 +17,63 @@ class APIConfig:
     
     # Rate Limiting
     # GLEIF API: 60 requests per minute per user
-    RATE_LIMIT_CODES = {429, 500, 502, 503, 504}
+    RATE_LIMIT_CODES = RATE_LIMIT_CODES
     
     # Retry configuration
     DEFAULT_MAX_RETRIES = 3
     DEFAULT_BACKOFF_BASE = 0.5
+
+    # Connection pooling
+    POOL_CONNECTIONS = 16
+    POOL_MAXSIZE = 32
     
     # Pagination
-    SEARCH_PAGE_SIZE = 100
-    REFERENCE_PAGE_SIZE = 200
+    # GLEIF API: page[size] is capped at 200 per request
+    MAX_PAGE_SIZE = 200
+    SEARCH_PAGE_SIZE = MAX_PAGE_SIZE
+    SEARCH_MAX_WORKERS = 8
+    # Search pages requested ahead of the one being processed
+    SEARCH_PAGE_WINDOW = 2 * SEARCH_MAX_WORKERS
+    REFERENCE_PAGE_SIZE = MAX_PAGE_SIZE
+    REFERENCE_MAX_WORKERS = 8
     
     # Instruments
     DEFAULT_INSTRUMENT_BUDGET = 20
-    INSTRUMENT_PAGE_SIZE = 200
+    INSTRUMENT_PAGE_SIZE = MAX_PAGE_SIZE
+    INSTRUMENT_MAX_WORKERS = 8
+
+    # Response caching
+    RESPONSE_CACHE_MAXSIZE = 5000
+    SEARCH_RESULT_CACHE_MAXSIZE = 512
+    ISIN_CACHE_MAXSIZE = 5000
+    SEARCH_CACHE_TTL_SECONDS = 15 * 60
+    INSTRUMENT_CACHE_TTL_SECONDS = 24 * 60 * 60
 
 
 class SearchConfig:
     """Search-specific configuration."""
     
     VALID_SEARCH_TYPES = {"name", "fulltext"}
+    # Query parameter carrying the search string for each search type
+    SEARCH_FILTER_PARAMS = {
+        "name": "filter[entity.legalName]",
+        "fulltext": "filter[fulltext]",
+    }
+    COUNTRY_FILTER_PARAM = "filter[entity.legalAddress.country]"
     COUNTRY_CODE_LENGTH = 2
+
+    # JSON:API sparse fieldset for lei-records: only what the extractors read
+    LEI_RECORD_FIELDS = ("lei", "entity", "registration", "bic")
+    # Relationship needed to follow ISIN links when enriching instruments
+    INSTRUMENT_RELATIONSHIP_FIELDS = ("isins",)
+    # JSON:API sparse fieldset for isins
+    ISIN_FIELDS = ("isin",)
+
+    # Output address key for each legalAddress field, in output order
+    ADDRESS_FIELDS = (
+        ("street", "firstAddressLine"),
+        ("additional", "additionalAddressLine"),
+        ("city", "city"),
+        ("postal_code", "postalCode"),
+        ("country", "country"),
+    )
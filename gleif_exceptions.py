@@ -25,3 +25,19 @@ class GLEIFDataError(GLEIFAPIError):
     """Raised when API response data is malformed or unexpected."""
     
     pass
+
+
+class GLEIFResumableError(GLEIFNetworkError):
+    """Raised when a resumable search fails partway through.
+
+    Attributes:
+        next_page: Page the search failed on and should resume from
+        resume_state: State to pass back to continue the search
+        partial: Results retrieved before the failure
+    """
+
+    def __init__(self, message, next_page, resume_state, partial=None):
+        super().__init__(message)
+        self.next_page = next_page
+        self.resume_state = resume_state
+        self.partial = partial if partial is not None else []
@@ -0,0 +1,106 @@
+"""
+HTTP session helpers shared by the GLEIF API clients.
+"""
+
+import inspect
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+from gleif_config import APIConfig
+from gleif_json import json_loads
+
+# Every content coding urllib3 can decode here; includes br when the optional
+# brotli package is installed, so compressed responses are never undecodable
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+# backoff_jitter needs urllib3 2.x; older releases back off deterministically
+_RETRY_SUPPORTS_JITTER = "backoff_jitter" in inspect.signature(Retry.__init__).parameters
+
+
+def create_session(
+    user_agent: str,
+    max_retries: int = APIConfig.DEFAULT_MAX_RETRIES,
+    backoff_base_seconds: float = APIConfig.DEFAULT_BACKOFF_BASE,
+    status_forcelist: Optional[Iterable[int]] = None,
+) -> requests.Session:
+    """
+    Create a requests session with a pooled, retrying HTTPS adapter.
+
+    Connections are kept alive in a pool sized for concurrent workers, and
+    dropped or refused connections are retried by urllib3 on the same pool
+    rather than by re-entering the requests call stack.
+
+    When ``status_forcelist`` is given, responses with those status codes are
+    retried as well, honoring the server's Retry-After header. Once retries
+    are exhausted the last response is returned rather than raised.
+
+    Each backoff delay gets up to ``backoff_base_seconds`` of random jitter,
+    so concurrent workers that fail together do not retry in lockstep.
+
+    Args:
+        user_agent: User-Agent header sent with every request
+        max_retries: Max retries for transient failures
+        backoff_base_seconds: Base seconds for exponential backoff
+        status_forcelist: Optional status codes to retry (e.g. 429, 503)
+
+    Returns:
+        Configured session
+    """
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": user_agent,
+        "Accept": "application/vnd.api+json",
+        "Accept-Encoding": ACCEPT_ENCODING,
+    })
+    retry_options: Dict[str, Any] = {}
+    if _RETRY_SUPPORTS_JITTER:
+        retry_options["backoff_jitter"] = max(0.0, backoff_base_seconds)
+    retry = Retry(
+        total=max(0, max_retries),
+        backoff_factor=max(0.0, backoff_base_seconds),
+        status_forcelist=status_forcelist,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=status_forcelist is not None,
+        raise_on_status=False,
+        **retry_options,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=APIConfig.POOL_CONNECTIONS,
+        pool_maxsize=APIConfig.POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def rejected_parameters(response: requests.Response) -> FrozenSet[str]:
+    """
+    Name the query parameters a 400 response's JSON:API errors point at.
+
+    Only errors carrying ``source.parameter`` are counted, so a rejection
+    for any other reason (a bad filter value, say) yields an empty set.
+
+    Args:
+        response: Response to inspect
+
+    Returns:
+        Rejected parameter names, e.g. ``{"page[size]"}``
+    """
+    if response.status_code != 400:
+        return frozenset()
+    try:
+        body = json_loads(response.content)
+    except ValueError:
+        return frozenset()
+    errors = body.get("errors") if isinstance(body, dict) else None
+    parameters = set()
+    for error in errors if isinstance(errors, list) else ():
+        source = error.get("source") if isinstance(error, dict) else None
+        if isinstance(source, dict) and isinstance(source.get("parameter"), str):
+            parameters.add(source["parameter"])
+    return frozenset(parameters)
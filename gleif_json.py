@@ -0,0 +1,59 @@
+"""
+JSON encoding and decoding for GLEIF API clients.
+
+Uses orjson when it is installed and falls back to the standard library
+json module otherwise, producing the same output either way. Without
+orjson, responses are decoded with ujson when that is installed; encoding
+stays on json, whose formatting ujson does not reproduce.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson is an optional decoding speedup
+    ujson = None
+
+
+def json_loads(data: bytes) -> Any:
+    """
+    Decode a JSON document.
+
+    Args:
+        data: UTF-8 encoded JSON bytes (or str)
+
+    Returns:
+        Decoded Python object
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data: Any, indent: bool = False) -> bytes:
+    """
+    Encode an object as UTF-8 JSON bytes.
+
+    Args:
+        data: Object to encode
+        indent: Pretty-print with two-space indentation
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -18,15 +18,20 @@ Command-line usage:
     python gleif_reference_data.py --list
 """
 
-import json
 import sys
 import argparse
 import logging
 import requests
 import os
-from typing import Dict, List, Any, Optional
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, ClassVar, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from gleif_config import APIConfig
+from gleif_http import create_session, rejected_parameters
+from gleif_json import json_loads, json_dumps
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -45,11 +50,35 @@ if not logger.handlers:
 class GLEIFReferenceDataFetcher:
     """Fetch reference data from the GLEIF API."""
 
+    # (name, path, description) for each reference data endpoint
+    _ENDPOINTS: ClassVar[Tuple[Tuple[str, str, str], ...]] = (
+        ("countries", "/countries", "ISO country codes and names"),
+        ("regions", "/regions", "ISO 3166-2 region/subdivision codes"),
+        ("entity-legal-forms", "/entity-legal-forms", "Legal entity form types (e.g., Corporation, LLC, Ltd)"),
+        ("jurisdictions", "/jurisdictions", "Jurisdictions for entity registration"),
+        ("registration-authorities", "/registration-authorities", "Business register authorities"),
+        ("registration-agents", "/registration-agents", "LEI registration agents"),
+        ("official-organizational-roles", "/official-organizational-roles", "Organizational role types"),
+    )
+
+    # Built once at class creation and shared by all instances
+    endpoints: ClassVar[Dict[str, Dict[str, str]]] = {
+        name: {"url": f"{APIConfig.BASE_URL}{path}", "description": description}
+        for name, path, description in _ENDPOINTS
+    }
+
+    # Sessions shared by all instances, keyed by retry settings, so fetchers
+    # created repeatedly in one process reuse pooled connections and TLS state
+    _shared_sessions: ClassVar[Dict[Tuple[int, float], requests.Session]] = {}
+    _shared_sessions_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(
         self,
         output_dir: str = "./reference_data",
         max_retries: int = APIConfig.DEFAULT_MAX_RETRIES,
         backoff_base_seconds: float = APIConfig.DEFAULT_BACKOFF_BASE,
+        max_workers: int = APIConfig.REFERENCE_MAX_WORKERS,
+        session: Optional[requests.Session] = None,
     ):
         """Initialize the reference data fetcher.
         
@@ -57,48 +86,48 @@ class GLEIFReferenceDataFetcher:
             output_dir: Directory to save JSON files (default: ./reference_data)
             max_retries: Max retries for transient failures
             backoff_base_seconds: Base seconds for exponential backoff
+            max_workers: Max endpoints fetched concurrently by fetch_all_data
+            session: Optional session to use instead of the shared one
         """
         self.output_dir = output_dir
         # Create output directory if it doesn't exist
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            logger.info(f"Created directory: {self.output_dir}")
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "GLEIF-Reference-Data-Tool/1.0"
-        })
+        self._out = Path(self.output_dir)
+        self._out.mkdir(parents=True, exist_ok=True)
         self.max_retries = max(0, max_retries)
         self.backoff_base_seconds = max(0.0, backoff_base_seconds)
-        self.endpoints = {
-            "countries": {
-                "url": f"{APIConfig.BASE_URL}/countries",
-                "description": "ISO country codes and names"
-            },
-            "regions": {
-                "url": f"{APIConfig.BASE_URL}/regions",
-                "description": "ISO 3166-2 region/subdivision codes"
-            },
-            "entity-legal-forms": {
-                "url": f"{APIConfig.BASE_URL}/entity-legal-forms",
-                "description": "Legal entity form types (e.g., Corporation, LLC, Ltd)"
-            },
-            "jurisdictions": {
-                "url": f"{APIConfig.BASE_URL}/jurisdictions",
-                "description": "Jurisdictions for entity registration"
-            },
-            "registration-authorities": {
-                "url": f"{APIConfig.BASE_URL}/registration-authorities",
-                "description": "Business register authorities"
-            },
-            "registration-agents": {
-                "url": f"{APIConfig.BASE_URL}/registration-agents",
-                "description": "LEI registration agents"
-            },
-            "official-organizational-roles": {
-                "url": f"{APIConfig.BASE_URL}/official-organizational-roles",
-                "description": "Organizational role types"
-            }
-        }
+        self.max_workers = max(1, max_workers)
+        # Lowered automatically if the API rejects the requested page size
+        self.page_size = APIConfig.REFERENCE_PAGE_SIZE
+        if session is None:
+            session = self._get_shared_session(self.max_retries, self.backoff_base_seconds)
+        self.session = session
+        # Prepared request and send settings per endpoint URL, see _get
+        self._request_templates: Dict[str, Tuple[requests.PreparedRequest, Dict[str, Any]]] = {}
+
+    @classmethod
+    def _get_shared_session(cls, max_retries: int, backoff_base_seconds: float) -> requests.Session:
+        """
+        Get the process-wide session for the given retry settings.
+
+        Args:
+            max_retries: Max retries for transient failures
+            backoff_base_seconds: Base seconds for exponential backoff
+
+        Returns:
+            Session shared by fetchers with the same retry settings
+        """
+        key = (max_retries, backoff_base_seconds)
+        with cls._shared_sessions_lock:
+            session = cls._shared_sessions.get(key)
+            if session is None:
+                session = create_session(
+                    "GLEIF-Reference-Data-Tool/1.0",
+                    max_retries=max_retries,
+                    backoff_base_seconds=backoff_base_seconds,
+                    status_forcelist=APIConfig.RATE_LIMIT_CODES,
+                )
+                cls._shared_sessions[key] = session
+        return session
 
     def fetch_all_data(self) -> Dict[str, Any]:
         """
@@ -107,52 +136,131 @@ class GLEIFReferenceDataFetcher:
         Returns:
             Dictionary with metadata about saved files
         """
+        # One timestamp for the whole run, shared by the summary and every file
+        run_timestamp = self._get_timestamp()
         summary = {
-            "timestamp": self._get_timestamp(),
+            "timestamp": run_timestamp,
             "api_version": "v1",
             "source": "GLEIF API",
             "output_directory": self.output_dir,
-            "files_saved": {}
         }
 
-        for endpoint_name, endpoint_info in self.endpoints.items():
-            logger.info(f"Fetching {endpoint_name}...")
-            try:
-                data = self._fetch_endpoint(endpoint_info["url"])
-                if data:
-                    # Create the data structure
-                    file_data = {
-                        "timestamp": self._get_timestamp(),
-                        "type": endpoint_name,
-                        "description": endpoint_info["description"],
-                        "count": len(data),
-                        "items": data
-                    }
-                    
-                    # Save to file
-                    filename = f"{endpoint_name}.json"
-                    filepath = os.path.join(self.output_dir, filename)
-                    self._save_to_file(filepath, file_data)
-                    
-                    summary["files_saved"][endpoint_name] = {
-                        "filename": filename,
-                        "count": len(data),
-                        "filepath": filepath
-                    }
-                    logger.info(f"  ✓ Retrieved {len(data)} items → {filename}")
-            except Exception as e:
-                logger.error(f"  ✗ Error fetching {endpoint_name}: {e}", exc_info=True)
-                summary["files_saved"][endpoint_name] = {
-                    "error": str(e)
-                }
+        files_saved = {}
+        max_workers = min(len(self.endpoints), self.max_workers)
+        summary_path = self._out / "_summary.json"
+        partial_path = self._out / "_summary.json.partial"
+
+        # Append each endpoint to a partial summary as soon as it completes, so
+        # an interrupted run still records which files were saved
+        with open(partial_path, 'wb') as summary_file:
+            self._write_json_fields(summary_file, summary)
+            summary_file.write(b'  "files_saved": {')
+
+            # Endpoints are independent and network-bound, so fetch them concurrently
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for endpoint_name, endpoint_info in self.endpoints.items():
+                    logger.info("Fetching %s...", endpoint_name)
+                    future = executor.submit(
+                        self._fetch_and_save_endpoint, endpoint_name, endpoint_info, run_timestamp
+                    )
+                    futures[future] = endpoint_name
+
+                for future in as_completed(futures):
+                    endpoint_name = futures[future]
+                    try:
+                        entry = future.result()
+                        if not entry:
+                            continue
+                        logger.info("  ✓ Retrieved %d items → %s", entry["count"], entry["filename"])
+                    except Exception as e:
+                        logger.error("  ✗ Error fetching %s: %s", endpoint_name, e, exc_info=True)
+                        entry = {
+                            "error": str(e)
+                        }
+                    summary_file.write(b",\n    " if files_saved else b"\n    ")
+                    summary_file.write(json_dumps(endpoint_name) + b": " + json_dumps(entry))
+                    summary_file.flush()
+                    files_saved[endpoint_name] = entry
+
+            summary_file.write(b"\n  }\n}\n" if files_saved else b"}\n}\n")
 
         # Save summary file
-        summary_path = os.path.join(self.output_dir, "_summary.json")
-        self._save_to_file(summary_path, summary)
-        logger.info(f"✓ Summary saved to _summary.json")
+        os.replace(partial_path, summary_path)
+        logger.info("✓ Summary saved to _summary.json")
+
+        # Keep the returned summary in endpoint order regardless of completion order
+        summary["files_saved"] = {
+            name: files_saved[name] for name in self.endpoints if name in files_saved
+        }
         
         return summary
 
+    def _fetch_and_save_endpoint(
+        self,
+        endpoint_name: str,
+        endpoint_info: Dict[str, str],
+        timestamp: str,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Stream one endpoint's items straight into its JSON file.
+
+        Items are written as each page arrives, so the full dataset is never
+        held in memory.
+
+        Args:
+            endpoint_name: Name of the endpoint (used for the filename)
+            endpoint_info: Endpoint URL and description
+            timestamp: Timestamp recorded in the saved file
+
+        Returns:
+            Summary entry for the saved file, or None if the endpoint was empty
+        """
+        filename = f"{endpoint_name}.json"
+        filepath = self._out / filename
+        etag_path = self._out / f"{endpoint_name}.etag"
+        url = endpoint_info["url"]
+
+        # Revalidate the saved file with the ETag from the previous run; a 304
+        # costs one round-trip and no download, parse, or rewrite
+        cached = self._load_etag(etag_path) if filepath.exists() else None
+        request_headers = {"If-None-Match": cached["etag"]} if cached else None
+        first_response = self._get(
+            url, params=self._page_params(1, self.page_size), headers=request_headers
+        )
+        if cached and first_response.status_code == 304:
+            logger.info("  %s unchanged since last fetch", endpoint_name)
+            return {
+                "filename": filename,
+                "count": cached["count"],
+                "filepath": str(filepath)
+            }
+        page_size = self.page_size
+
+        header = {
+            "timestamp": timestamp,
+            "type": endpoint_name,
+            "description": endpoint_info["description"],
+        }
+        count = self._stream_items_to_file(
+            filepath, header, self._iter_endpoint(url, page_size, first_response=first_response)
+        )
+        if not count:
+            return None
+
+        # Page-level ETags only describe the whole dataset when it fits on one page
+        etag = first_response.headers.get("ETag")
+        if first_response.status_code == 200 and etag and count <= page_size:
+            self._save_to_file(etag_path, {"etag": etag, "count": count})
+        elif etag_path.exists():
+            etag_path.unlink()
+
+        return {
+            "filename": filename,
+            "count": count,
+            "filepath": str(filepath)
+        }
+
     def fetch_data_by_type(self, data_type: str) -> Optional[Dict[str, Any]]:
         """
         Fetch a specific type of reference data and save to JSON file.
@@ -164,164 +272,293 @@ class GLEIFReferenceDataFetcher:
             Dictionary with the reference data or None if type not found
         """
         if data_type not in self.endpoints:
-            logger.error(f"Unknown data type '{data_type}'")
-            logger.info(f"Available types: {', '.join(self.endpoints.keys())}")
+            logger.error("Unknown data type '%s'", data_type)
+            logger.info("Available types: %s", ", ".join(self.endpoints))
             return None
 
         endpoint_info = self.endpoints[data_type]
-        logger.info(f"Fetching {data_type}...")
+        logger.info("Fetching %s...", data_type)
 
         try:
-            data = self._fetch_endpoint(endpoint_info["url"])
-            if data:
+            data, count = self._fetch_endpoint(endpoint_info["url"])
+            if count:
                 result = {
                     "timestamp": self._get_timestamp(),
                     "type": data_type,
                     "description": endpoint_info["description"],
-                    "count": len(data),
+                    "count": count,
                     "items": data
                 }
                 
                 # Save to file
                 filename = f"{data_type}.json"
-                filepath = os.path.join(self.output_dir, filename)
-                self._save_to_file(filepath, result)
+                self._save_to_file(self._out / filename, result)
                 
-                logger.info(f"✓ Retrieved {len(data)} items → {filename}")
+                logger.info("✓ Retrieved %d items → %s", count, filename)
                 return result
         except Exception as e:
-            logger.error(f"✗ Error: {e}", exc_info=True)
+            logger.error("✗ Error: %s", e, exc_info=True)
             return None
 
-    def _fetch_endpoint(self, url: str, page_size: int = APIConfig.REFERENCE_PAGE_SIZE) -> List[Dict[str, Any]]:
+    def _fetch_endpoint(
+        self, url: str, page_size: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
         """
         Fetch all data from a given endpoint with pagination.
 
         Args:
             url: The API endpoint URL
-            page_size: Number of items per page
+            page_size: Number of items per page (default: self.page_size)
 
         Returns:
-            List of all items from the endpoint
+            Tuple of (all items from the endpoint, item count)
         """
-        all_items = []
-        page_num = 1
+        items = list(self._iter_endpoint(url, page_size))
+        return items, len(items)
 
-        while True:
-            params = {
-                "page[number]": page_num,
-                "page[size]": page_size
-            }
+    def _iter_endpoint(
+        self,
+        url: str,
+        page_size: Optional[int] = None,
+        first_response: Optional[requests.Response] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield processed items from a given endpoint, one page at a time.
+
+        If the API rejects the page size on the first page, the page size is
+        halved and the request retried, so the largest accepted size is used
+        without hardcoding the server limit. The reduced size applies to this
+        endpoint only.
+
+        Args:
+            url: The API endpoint URL
+            page_size: Number of items per page (default: self.page_size)
+            first_response: Already-fetched response for page 1, if any
+
+        Yields:
+            Processed items in page order
+        """
+        page_size = page_size or self.page_size
+        page_num = 1
 
-            response = self._get_with_backoff(url, params=params)
-            response.raise_for_status()
+        # Pipeline pagination: a single background worker requests page N+1
+        # while page N is being processed, hiding the round-trip behind parsing
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            if first_response is None:
+                next_page = prefetcher.submit(
+                    self._get, url, params=self._page_params(page_num, page_size)
+                )
 
-            data = response.json()
+            while True:
+                if first_response is not None:
+                    response, first_response = first_response, None
+                else:
+                    response = next_page.result()
+                if page_num == 1 and page_size > 1 and self._is_page_size_rejection(response):
+                    # Kept local: other endpoints may accept a larger size
+                    page_size //= 2
+                    logger.warning("Page size rejected by API; retrying with page[size]=%d", page_size)
+                    next_page = prefetcher.submit(
+                        self._get, url, params=self._page_params(page_num, page_size)
+                    )
+                    continue
+                response.raise_for_status()
+
+                data = json_loads(response.content)
+
+                if "data" not in data or not data["data"]:
+                    break
+
+                # Check if there are more pages before processing this one
+                meta = data.get("meta", {})
+                pagination = meta.get("pagination", {})
+                is_last_page = self._should_stop_pagination(
+                    pagination, page_num, len(data["data"]), page_size
+                )
+                if not is_last_page:
+                    next_page = prefetcher.submit(
+                        self._get, url, params=self._page_params(page_num + 1, page_size)
+                    )
 
-            if "data" not in data or not data["data"]:
-                break
+                # Flatten each item into its id plus attributes in one allocation
+                for item in data["data"]:
+                    yield {"id": item.get("id", ""), **(item.get("attributes") or {})}
 
-            # Process items and extract key information
-            for item in data["data"]:
-                processed_item = self._process_item(item)
-                all_items.append(processed_item)
+                if is_last_page:
+                    break
 
-            # Check if there are more pages
-            meta = data.get("meta", {})
-            pagination = meta.get("pagination", {})
-            if self._should_stop_pagination(pagination, page_num):
-                break
+                page_num += 1
 
-            page_num += 1
+    @staticmethod
+    def _page_params(page_num: int, page_size: int) -> Dict[str, Any]:
+        """Build the pagination query parameters for a page."""
+        return {
+            "page[number]": page_num,
+            "page[size]": page_size
+        }
 
-        return all_items
+    @staticmethod
+    def _is_page_size_rejection(response: requests.Response) -> bool:
+        """Check whether a response is a 400 rejecting the requested page size."""
+        return "page[size]" in rejected_parameters(response)
 
-    def _get_with_backoff(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
         """
-        GET with simple retry/backoff for transient errors.
-        
+        GET a URL on the shared session.
+
+        Session-level preparation (header merging, netrc and proxy
+        environment lookups) is done once per URL and reused, so each page
+        request only re-encodes its query string and cookies. Transient
+        failures and rate-limit responses are retried by the session's
+        adapter, which honors the server's Retry-After header.
+
         Args:
             url: URL to request
             params: Query parameters
-            
+            headers: Extra request headers
+
         Returns:
             Response object
         """
-        for attempt in range(self.max_retries + 1):
-            response = self.session.get(url, params=params, timeout=APIConfig.TIMEOUT_SECONDS)
-            if response.status_code not in APIConfig.RATE_LIMIT_CODES:
-                return response
-            if attempt < self.max_retries:
-                delay = self.backoff_base_seconds * (2 ** attempt)
-                logger.warning(
-                    f"Rate limited (status {response.status_code}). "
-                    f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
-                )
-                time.sleep(delay)
-        return response
-
-    def _process_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process a single item from the API response.
+        template = self._request_templates.get(url)
+        if template is None:
+            prepared = self.session.prepare_request(requests.Request("GET", url))
+            prepared.headers.pop("Cookie", None)
+            settings = self.session.merge_environment_settings(url, {}, None, None, None)
+            template = self._request_templates[url] = (prepared, settings)
+
+        prepared, settings = template
+        request = prepared.copy()
+        request.prepare_url(url, params)
+        request.prepare_cookies(self.session.cookies)
+        if headers:
+            request.headers.update(headers)
+        return self.session.send(request, timeout=APIConfig.TIMEOUT_SECONDS, **settings)
+
+    def _save_to_file(self, filepath: Union[str, Path], data: Dict[str, Any]) -> None:
+        """Save data to a JSON file.
 
+        The data is written to a temporary file and moved into place, so an
+        interrupted write never leaves a corrupt file behind.
+        
         Args:
-            item: Raw item from API response
-
-        Returns:
-            Processed item with key information
+            filepath: Path to save the file
+            data: Data to save
         """
-        attributes = item.get("attributes", {})
-        item_id = item.get("id", "")
-
-        processed = {
-            "id": item_id,
-        }
-
-        # Add all attributes
-        processed.update(attributes)
+        tmp_path = f"{filepath}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(json_dumps(data, indent=True) + b"\n")
+            os.replace(tmp_path, filepath)
+        except Exception as e:
+            logger.error("Error saving to %s: %s", filepath, e, exc_info=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-        return processed
+    def _stream_items_to_file(
+        self,
+        filepath: Union[str, Path],
+        header: Dict[str, Any],
+        items: Iterable[Dict[str, Any]],
+    ) -> int:
+        """Write a reference data file, streaming items as they are produced.
+
+        The envelope fields in ``header`` are written first, then one item per
+        line, and finally the item count. Output goes to a temporary file that
+        replaces ``filepath`` only once every item is written, so a failed
+        fetch never leaves a truncated file; if there are no items at all the
+        existing file is left untouched.
 
-    def _save_to_file(self, filepath: str, data: Dict[str, Any]) -> None:
-        """Save data to a JSON file.
-        
         Args:
             filepath: Path to save the file
-            data: Data to save
+            header: Envelope fields written before the items
+            items: Items to write
+
+        Returns:
+            Number of items written
         """
+        count = 0
+        tmp_path = f"{filepath}.tmp"
         try:
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving to {filepath}: {e}", exc_info=True)
+            with open(tmp_path, 'wb') as f:
+                self._write_json_fields(f, header)
+                f.write(b'  "items": [')
+                for item in items:
+                    f.write(b",\n    " if count else b"\n    ")
+                    f.write(json_dumps(item))
+                    count += 1
+                f.write(b"\n  ],\n")
+                f.write(b'  "count": ' + json_dumps(count) + b"\n}\n")
+            if count:
+                os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return count
+
+    @staticmethod
+    def _write_json_fields(f: BinaryIO, fields: Dict[str, Any]) -> None:
+        """Open a JSON object and write ``fields`` as its leading members."""
+        f.write(b"{\n")
+        for key, value in fields.items():
+            f.write(b"  " + json_dumps(key) + b": " + json_dumps(value) + b",\n")
+
+    def _load_etag(self, etag_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+        """Load a saved ETag and item count, or None if unavailable."""
+        try:
+            with open(etag_path, 'rb') as f:
+                cached = json_loads(f.read())
+            return cached if cached.get("etag") else None
+        except (OSError, ValueError, AttributeError):
+            return None
 
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format."""
-        from datetime import datetime, timezone
-        return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
 
     def list_available_types(self) -> None:
         """Print available reference data types."""
         logger.info("Available Reference Data Types:")
         logger.info("")
         for name, info in self.endpoints.items():
-            logger.info(f"  {name:35} - {info['description']}")
+            logger.info("  %-35s - %s", name, info["description"])
         logger.info("")
 
     @staticmethod
-    def _should_stop_pagination(pagination: Dict[str, Any], current_page: int) -> bool:
+    def _should_stop_pagination(
+        pagination: Dict[str, Any],
+        current_page: int,
+        item_count: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> bool:
         """
         Determine if pagination should stop.
+
+        A page holding fewer items than the page size is always the last one,
+        which saves a round-trip when lastPage is missing or misreported.
         
         Args:
             pagination: Pagination metadata from API response
             current_page: Current page number
+            item_count: Number of items on the current page, if known
+            page_size: Requested page size, if known
             
         Returns:
             True if pagination should stop, False otherwise
         """
+        # Prefer the server's page size in case it capped the requested one
+        per_page = pagination.get("perPage") or page_size
+        if item_count is not None and per_page and item_count < per_page:
+            return True
         last_page = pagination.get("lastPage")
-        return not last_page or last_page == current_page
+        if not last_page:
+            return True
+        return pagination.get("currentPage", current_page) >= last_page
 
 
 def main():
@@ -381,6 +618,12 @@ Examples:
         default=APIConfig.DEFAULT_BACKOFF_BASE,
         help=f"Base seconds for exponential backoff (default: {APIConfig.DEFAULT_BACKOFF_BASE})"
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=APIConfig.REFERENCE_MAX_WORKERS,
+        help=f"Max endpoints fetched concurrently with --all (default: {APIConfig.REFERENCE_MAX_WORKERS})"
+    )
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
@@ -397,6 +640,7 @@ Examples:
         output_dir=args.output,
         max_retries=args.max_retries,
         backoff_base_seconds=args.backoff_base_seconds,
+        max_workers=args.max_workers,
     )
 
     # Handle --list
@@ -407,46 +651,14 @@ Examples:
     # Handle --all
     if args.all:
         result = fetcher.fetch_all_data()
-        logger.info(f"All reference data saved to: {args.output}")
-        sys.exit(0)
-
-    # Handle specific data type
-    if args.data_type:
-        result = fetcher.fetch_data_by_type(args.data_type)
-        if result:
-            logger.info(f"Data saved to: {args.output}/{args.data_type}.json")
-        sys.exit(0)
-
-    # No arguments provided
-    parser.print_help()
-    sys.exit(1)
-        help="Base seconds for exponential backoff (default: 0.5)"
-    )
-
-    args = parser.parse_args()
-
-    fetcher = GLEIFReferenceDataFetcher(
-        output_dir=args.output,
-        max_retries=args.max_retries,
-        backoff_base_seconds=args.backoff_base_seconds,
-    )
-
-    # Handle --list
-    if args.list:
-        fetcher.list_available_types()
-        sys.exit(0)
-
-    # Handle --all
-    if args.all:
-        result = fetcher.fetch_all_data()
-        print(f"\nAll reference data saved to: {args.output}", file=sys.stderr)
+        logger.info("All reference data saved to: %s", args.output)
         sys.exit(0)
 
     # Handle specific data type
     if args.data_type:
         result = fetcher.fetch_data_by_type(args.data_type)
         if result:
-            print(f"\nData saved to: {args.output}/{args.data_type}.json", file=sys.stderr)
+            logger.info("Data saved to: %s/%s.json", args.output, args.data_type)
         sys.exit(0)
 
     # No arguments provided
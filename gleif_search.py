@@ -17,19 +17,30 @@ Command-line usage:
     python gleif_search.py "Citibank" --fulltext --country GB
 """
 
-import json
+from __future__ import annotations
+
 import sys
 import argparse
+import copy
+import os
 import time
 import logging
+import threading
 import requests
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict, deque
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+from typing import Callable, ClassVar, Generator, Iterator, List, Dict, Any, Optional, Set, Tuple
 
 from gleif_config import APIConfig, SearchConfig
+from gleif_http import create_session, rejected_parameters
+from gleif_json import json_loads, json_dumps
 from gleif_exceptions import (
     GLEIFValidationError,
     GLEIFNetworkError,
     GLEIFDataError,
+    GLEIFResumableError,
 )
 
 # Configure logging
@@ -49,30 +60,118 @@ if not logger.handlers:
 class GLEIFSearcher:
     """Search for legal entities using the GLEIF API."""
 
+    # Resource types ("lei-records", "isins") whose sparse fieldsets the API
+    # has rejected; they are requested in full for the rest of the process
+    _rejected_fieldsets: ClassVar[Set[str]] = set()
+
+    # One pooled session per retry configuration, shared by every searcher in
+    # the process so warm keep-alive connections outlive short-lived searchers.
+    # Each entry counts the open searchers using it: (session, users)
+    _shared_sessions: ClassVar[Dict[Tuple[int, float], List[Any]]] = {}
+    _shared_sessions_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(
         self,
         page_size: int = APIConfig.SEARCH_PAGE_SIZE,
         instrument_request_budget: int = APIConfig.DEFAULT_INSTRUMENT_BUDGET,
         max_retries: int = APIConfig.DEFAULT_MAX_RETRIES,
         backoff_base_seconds: float = APIConfig.DEFAULT_BACKOFF_BASE,
+        session: Optional[requests.Session] = None,
     ):
         """
         Initialize the GLEIF searcher.
 
         Args:
-            page_size: Number of results per page (max 100)
+            page_size: Number of results per page (max 200; lowered automatically
+                if the API rejects it)
             instrument_request_budget: Max number of instrument lookup requests
-            max_retries: Max retries for transient instrument lookup failures
+            max_retries: Max retries for transient failures
             backoff_base_seconds: Base seconds for exponential backoff
+            session: Optional session to use instead of the shared one
         """
-        self.page_size = min(page_size, APIConfig.SEARCH_PAGE_SIZE)
+        self.page_size = max(1, min(page_size, APIConfig.MAX_PAGE_SIZE))
         self.instrument_request_budget = max(0, instrument_request_budget)
+        # Instrument lookups run concurrently and share the request budget
+        self._budget_lock = threading.Lock()
         self.max_retries = max(0, max_retries)
         self.backoff_base_seconds = max(0.0, backoff_base_seconds)
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "GLEIF-Search-Tool/1.0"
-        })
+        # Key of the shared session this searcher holds, None for an injected one
+        self._shared_key: Optional[Tuple[int, float]] = None
+        if session is None:
+            self._shared_key = (self.max_retries, self.backoff_base_seconds)
+            session = self._acquire_shared_session(self._shared_key)
+        self.session = session
+        # Prepared request and send settings per URL origin, see _get_with_backoff
+        self._request_templates: Dict[str, Tuple[requests.PreparedRequest, Dict[str, Any]]] = {}
+        # Decoded responses keyed by (url, params), oldest first: (expires_at, body)
+        self._cache: OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Completed search_entities results keyed by normalized search, oldest
+        # first: (expires_at, entities)
+        self._search_cache: OrderedDict[Tuple[Any, ...], Tuple[float, List[Dict[str, Any]]]] = OrderedDict()
+        # Complete ISIN lists keyed by LEI, oldest first: (expires_at, isins)
+        self._isin_cache: OrderedDict[str, Tuple[float, List[Optional[str]]]] = OrderedDict()
+
+    @classmethod
+    def _acquire_shared_session(cls, key: Tuple[int, float]) -> requests.Session:
+        """
+        Get the process-wide session for the given retry settings, counting a new user.
+
+        Args:
+            key: (max_retries, backoff_base_seconds) retry settings
+
+        Returns:
+            Session shared by searchers with the same retry settings
+        """
+        with cls._shared_sessions_lock:
+            entry = cls._shared_sessions.get(key)
+            if entry is None:
+                max_retries, backoff_base_seconds = key
+                # Pooled keep-alive connections sized for concurrent page fetches. The
+                # adapter retries dropped connections and rate-limit statuses
+                session = create_session(
+                    "GLEIF-Search-Tool/1.0",
+                    max_retries=max_retries,
+                    backoff_base_seconds=backoff_base_seconds,
+                    status_forcelist=APIConfig.RATE_LIMIT_CODES,
+                )
+                entry = cls._shared_sessions[key] = [session, 0]
+            entry[1] += 1
+            return entry[0]
+
+    def close(self) -> None:
+        """
+        Release the HTTP session.
+
+        A shared session is closed, and its pooled connections released, once
+        the last searcher using it is closed. An injected session belongs to
+        the caller and is left open. Closing twice has no further effect.
+        """
+        key, self._shared_key = self._shared_key, None
+        if key is None:
+            return
+        with GLEIFSearcher._shared_sessions_lock:
+            entry = GLEIFSearcher._shared_sessions.get(key)
+            if entry is None or entry[0] is not self.session:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del GLEIFSearcher._shared_sessions[key]
+        self.session.close()
+
+    def clear_cache(self) -> None:
+        """Drop all cached search results, ISIN lists and API responses."""
+        with self._cache_lock:
+            self._search_cache.clear()
+            self._isin_cache.clear()
+            self._cache.clear()
+
+    def __enter__(self) -> GLEIFSearcher:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
 
     def search_entities(
         self,
@@ -80,90 +179,651 @@ class GLEIFSearcher:
         search_type: str = "name",
         country_of_jurisdiction: Optional[str] = None,
         include_instruments: bool = False,
+        resume_state: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search for legal entities matching the given query.
 
+        Results of searches that complete without errors, including every
+        instrument lookup, are cached for SEARCH_CACHE_TTL_SECONDS; repeating
+        a search returns a copy of the cached list.
+
         Args:
             query: Search string to find matching entities
             search_type: Type of search - "name" (default) for legal entity name only,
                         or "fulltext" to search across all fields
             country_of_jurisdiction: Optional 2-letter country code to filter results
             include_instruments: Whether to include BIC/ISIN enrichment
+            resume_state: Opt in to resumable searches; pass {} to start one, or
+                the resume_state of a GLEIFResumableError to continue it
 
         Returns:
             List of matching entities with extracted information
             
         Raises:
             GLEIFValidationError: If input parameters are invalid
+            GLEIFResumableError: If a resumable search fails; its partial
+                attribute holds the results retrieved before the failure
+        """
+        # Validates the parameters now; no page is requested until iterated
+        results = self.iter_entities(
+            query,
+            search_type=search_type,
+            country_of_jurisdiction=country_of_jurisdiction,
+            include_instruments=include_instruments,
+            resume_state=resume_state,
+        )
+        if resume_state:
+            # Continuing a search yields only its remaining pages
+            return self._collect_entities(results)[0]
+
+        # Keyed on the query exactly as sent, since the API decides how to match it
+        key = (
+            query,
+            search_type,
+            self._normalize_country(country_of_jurisdiction),
+            include_instruments,
+        )
+        now = time.monotonic()
+        cached = self._cache_get(self._search_cache, key, now)
+        if cached is not None:
+            logger.info("Returning cached results for '%s'", query)
+            return copy.deepcopy(cached)
+
+        entities, complete = self._collect_entities(results)
+        if complete:
+            self._cache_put(
+                self._search_cache,
+                key,
+                copy.deepcopy(entities),
+                now + APIConfig.SEARCH_CACHE_TTL_SECONDS,
+                APIConfig.SEARCH_RESULT_CACHE_MAXSIZE,
+            )
+        return entities
+
+    @staticmethod
+    def _collect_entities(
+        results: Generator[Dict[str, Any], None, bool],
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Drain a search results generator into a list.
+
+        Args:
+            results: Generator returned by iter_entities
+
+        Returns:
+            Tuple of (entities, whether every page was retrieved and enriched)
+
+        Raises:
+            GLEIFResumableError: If a resumable search fails; its partial
+                attribute holds the results retrieved before the failure
+        """
+        entities = []
+        try:
+            while True:
+                entities.append(next(results))
+        except StopIteration as stop:
+            return entities, bool(stop.value)
+        except GLEIFResumableError as e:
+            e.partial = entities
+            raise
+
+    def iter_entities(
+        self,
+        query: str,
+        search_type: str = "name",
+        country_of_jurisdiction: Optional[str] = None,
+        include_instruments: bool = False,
+        resume_state: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Search for legal entities, yielding each one as soon as its page is processed.
+
+        Parameters are validated immediately; pages are fetched as the
+        iterator is consumed.
+
+        By default a failed request or unparseable page ends the search quietly
+        with the results retrieved so far. With ``resume_state`` the failure is
+        raised instead as a GLEIFResumableError whose resume_state continues
+        the search at the failed page.
+
+        Args:
+            query: Search string to find matching entities
+            search_type: Type of search - "name" (default) for legal entity name only,
+                        or "fulltext" to search across all fields
+            country_of_jurisdiction: Optional 2-letter country code to filter results
+            include_instruments: Whether to include BIC/ISIN enrichment
+            resume_state: Opt in to resumable searches; pass {} to start one, or
+                the resume_state of a GLEIFResumableError to continue it
+
+        Returns:
+            Iterator over matching entities with extracted information
+
+        Raises:
+            GLEIFValidationError: If input parameters are invalid, or
+                resume_state belongs to a different search
         """
         # Validate input parameters
         self._validate_search_params(query, search_type, country_of_jurisdiction)
-        
-        entities = []
-        page_num = 1
+        country = self._normalize_country(country_of_jurisdiction)
+        if resume_state:
+            if (resume_state.get("query"), resume_state.get("search_type"), resume_state.get("country")) \
+                    != (query, search_type, country):
+                raise GLEIFValidationError("resume_state belongs to a different search")
+        return self._iter_search_results(
+            query, search_type, country, include_instruments, resume_state
+        )
 
-        # Set filter based on search type
-        if search_type == "fulltext":
-            filter_field = "fulltext"
-        else:
-            filter_field = "entity.legalName"
+    def _iter_search_results(
+        self,
+        query: str,
+        search_type: str,
+        country: Optional[str],
+        include_instruments: bool,
+        resume_state: Optional[Dict[str, Any]],
+    ) -> Generator[Dict[str, Any], None, bool]:
+        """
+        Yield entities for already-validated search parameters; see iter_entities.
 
-        logger.info(f"Starting search for '{query}' (type: {search_type})")
-        if country_of_jurisdiction:
-            logger.info(f"Filtering by country: {country_of_jurisdiction.upper()}")
+        ``country`` is the normalized (uppercase) country code, or None.
 
-        while True:
-            try:
-                # Use lei-records endpoint with appropriate filter
-                params = {
-                    f"filter[{filter_field}]": query,
-                    "page[number]": page_num,
-                    "page[size]": self.page_size
-                }
-                
-                # Add country filter if provided
-                if country_of_jurisdiction:
-                    params["filter[entity.legalAddress.country]"] = country_of_jurisdiction.upper()
-
-                response = self._get_with_backoff(
-                    f"{APIConfig.BASE_URL}/lei-records",
-                    params=params
-                )
-                response.raise_for_status()
+        Returns:
+            True if every page was retrieved and enriched, False if the search
+            stopped early or an instrument lookup was cut short
+        """
+        entity_count = 0
+        complete = False
+        instruments_complete = True
+        first_page = page_num = (resume_state or {}).get("next_page", 1)
+        page_size = (resume_state or {}).get("page_size", self.page_size)
 
-                data = response.json()
+        logger.info("Starting search for '%s' (type: %s)", query, search_type)
+        if country:
+            logger.info("Filtering by country: %s", country)
+
+        # Use lei-records endpoint with appropriate filter; these params are
+        # shared by every page, which only adds its own page[number]
+        url = f"{APIConfig.BASE_URL}/lei-records"
+        fields = SearchConfig.LEI_RECORD_FIELDS
+        if include_instruments:
+            fields += SearchConfig.INSTRUMENT_RELATIONSHIP_FIELDS
+        params = self._build_search_params(query, search_type, country, page_size, fields)
+
+        with ThreadPoolExecutor(max_workers=APIConfig.SEARCH_MAX_WORKERS) as executor, \
+                ThreadPoolExecutor(max_workers=APIConfig.INSTRUMENT_MAX_WORKERS) as instrument_executor:
+            # In-flight page requests, oldest (next to process) first
+            futures = deque()
+            remaining_pages = None
+            try:
+                data = self._fetch_first_search_page(url, params, page_num)
 
                 # Extract the matched LEI data
-                if "data" not in data or not data["data"]:
-                    break
+                while data.get("data"):
+                    if remaining_pages is None:
+                        # Check if there are more results
+                        meta = data.get("meta", {})
+                        pagination = meta.get("pagination", {})
+                        remaining_pages = iter(())
+                        if not self._should_stop_pagination(
+                            pagination, page_num, len(data["data"]), params["page[size]"]
+                        ):
+                            # The first page reveals the page count, so request the
+                            # rest concurrently before processing this one, keeping
+                            # a bounded window of pages in flight
+                            remaining_pages = iter(range(first_page + 1, int(pagination["lastPage"]) + 1))
+                            for number in islice(remaining_pages, APIConfig.SEARCH_PAGE_WINDOW):
+                                futures.append(executor.submit(self._fetch_search_page, url, params, number))
+
+                    page_entities = []
+                    enriched = []
+                    for item in data["data"]:
+                        # Instruments are looked up below, concurrently for the whole page
+                        lei_record = self._extract_lei_record_info(item)
+                        if lei_record:
+                            page_entities.append(lei_record)
+                            if include_instruments:
+                                enriched.append((item, lei_record))
+                    if enriched and not self._add_financial_instruments(instrument_executor, enriched):
+                        instruments_complete = False
+                    for lei_record in page_entities:
+                        entity_count += 1
+                        yield lei_record
+
+                    if not futures:
+                        break
+                    next_page = futures.popleft()
+                    # Top the window back up before waiting on the next page
+                    number = next(remaining_pages, None)
+                    if number is not None:
+                        futures.append(executor.submit(self._fetch_search_page, url, params, number))
+                    page_num += 1
+                    data = next_page.result()
+                complete = True
+
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                if isinstance(e, requests.exceptions.RequestException):
+                    logger.error(
+                        "API request failed on page %d for query '%s': %s", page_num, query, e,
+                        exc_info=True
+                    )
+                else:
+                    logger.error("Error parsing API response on page %d: %s", page_num, e, exc_info=True)
+                logger.info("Retrieved %d results before failure", entity_count)
+                if resume_state is not None:
+                    raise GLEIFResumableError(
+                        f"Search failed on page {page_num}: {e}",
+                        next_page=page_num,
+                        resume_state={
+                            "query": query,
+                            "search_type": search_type,
+                            "country": country,
+                            "page_size": params["page[size]"],
+                            "next_page": page_num,
+                        },
+                    ) from e
+            finally:
+                # Don't wait on pages that will never be used
+                for future in futures:
+                    future.cancel()
+
+        logger.info("Search complete: %d entities found", entity_count)
+        return complete and instruments_complete
+
+    def count_entities(
+        self,
+        query: str,
+        search_type: str = "name",
+        country_of_jurisdiction: Optional[str] = None,
+    ) -> int:
+        """
+        Count the legal entities a search would return, without retrieving them.
+
+        Only a single one-record page is requested, so this is a cheap way to
+        check whether a query is too broad (or matches nothing) before
+        running the search itself.
+
+        Args:
+            query: Search string to find matching entities
+            search_type: Type of search - "name" (default) for legal entity name only,
+                        or "fulltext" to search across all fields
+            country_of_jurisdiction: Optional 2-letter country code to filter results
+
+        Returns:
+            Number of matching entities
 
-                for item in data["data"]:
-                    lei_record = self._extract_lei_record_info(item, include_instruments)
-                    if lei_record:
-                        entities.append(lei_record)
+        Raises:
+            GLEIFValidationError: If input parameters are invalid
+            GLEIFNetworkError: If the request fails
+            GLEIFDataError: If the response has no usable pagination metadata
+        """
+        self._validate_search_params(query, search_type, country_of_jurisdiction)
+        url = f"{APIConfig.BASE_URL}/lei-records"
+        params = self._build_search_params(
+            query, search_type, self._normalize_country(country_of_jurisdiction), 1, ("lei",)
+        )
+        try:
+            data = self._fetch_first_search_page(url, params)
+        except requests.exceptions.RequestException as e:
+            raise GLEIFNetworkError(f"Count request failed for query '{query}': {e}") from e
+        except ValueError as e:
+            raise GLEIFDataError(f"Error parsing API response: {e}") from e
+
+        total = data["meta"]["pagination"].get("total")
+        if total is None:
+            if data.get("data"):
+                raise GLEIFDataError("API response has no result total")
+            return 0
+        return int(total)
+
+    @staticmethod
+    def _build_search_params(
+        query: str,
+        search_type: str,
+        country: Optional[str],
+        page_size: int,
+        fields: Tuple[str, ...],
+    ) -> Dict[str, Any]:
+        """
+        Build the query parameters shared by every page of a search.
+
+        Args:
+            query: Search string
+            search_type: "name" or "fulltext"
+            country: Optional normalized country code
+            page_size: Records per page
+            fields: lei-records fields to request unless the API rejected that fieldset
 
-                # Check if there are more results
-                meta = data.get("meta", {})
-                pagination = meta.get("pagination", {})
-                if self._should_stop_pagination(pagination, page_num):
+        Returns:
+            Query parameters without a page number
+        """
+        params = {
+            SearchConfig.SEARCH_FILTER_PARAMS[search_type]: query,
+            "page[size]": page_size
+        }
+
+        # Add country filter if provided
+        if country:
+            params[SearchConfig.COUNTRY_FILTER_PARAM] = country
+
+        # Only request the fields the extractors read
+        if "lei-records" not in GLEIFSearcher._rejected_fieldsets:
+            params["fields[lei-records]"] = ",".join(fields)
+        return params
+
+    def _add_financial_instruments(
+        self,
+        executor: ThreadPoolExecutor,
+        records: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    ) -> bool:
+        """
+        Add instruments to extracted entities, looking up ISIN pages concurrently.
+
+        The first ISIN page of every record is requested at once; once their
+        page counts are known, the remaining pages of every record are
+        requested together. Budget is claimed in record order before each
+        request is submitted. Entities whose complete ISIN list was fetched
+        recently are served from memory without using any budget.
+
+        Args:
+            executor: Pool that runs the ISIN page requests
+            records: Pairs of (raw LEI record, extracted entity info)
+
+        Returns:
+            True if every record's ISINs were fetched, False if a page failed
+            or the budget ran out
+        """
+        links = [self._collect_instrument_links(record) for record, _ in records]
+        leis = [entity_info.get("legal_entity_id") for _, entity_info in records]
+        now = time.monotonic()
+        budget_exhausted = False
+        failed = False
+
+        def submit_page(isins_link: str, page_num: int) -> Optional[Future]:
+            nonlocal budget_exhausted
+            if not self._take_instrument_request():
+                budget_exhausted = True
+                return None
+            return executor.submit(self._fetch_isin_page, isins_link, page_num)
+
+        # ISIN codes per record, and page requests per uncached record in page order
+        isins: Dict[int, List[Optional[str]]] = {}
+        pages: Dict[int, List[Future]] = {}
+        # Records whose remaining pages were cut short by the budget
+        truncated = set()
+        for index, (isins_link, _) in enumerate(links):
+            if not isins_link:
+                continue
+            cached = self._cache_get(self._isin_cache, leis[index], now) if leis[index] else None
+            if cached is not None:
+                isins[index] = cached
+                continue
+            first_page = submit_page(isins_link, 1)
+            if first_page is not None:
+                pages[index] = [first_page]
+
+        # Page 1 reveals each record's page count; request the rest together
+        for index, record_pages in pages.items():
+            try:
+                isins_data = record_pages[0].result()
+            except Exception:
+                continue  # Reported when the pages are assembled below
+            pagination = isins_data.get("meta", {}).get("pagination", {})
+            if self._should_stop_pagination(
+                pagination, 1, len(isins_data.get("data", [])), APIConfig.INSTRUMENT_PAGE_SIZE
+            ):
+                continue
+            for page_num in range(2, int(pagination["lastPage"]) + 1):
+                page = submit_page(links[index][0], page_num)
+                if page is None:
+                    truncated.add(index)
                     break
+                record_pages.append(page)
 
-                page_num += 1
+        if budget_exhausted:
+            logger.warning("Instrument lookup budget exhausted; stopping ISIN enrichment.")
 
-            except requests.exceptions.RequestException as e:
-                logger.error(
-                    f"API request failed on page {page_num} for query '{query}': {e}",
-                    exc_info=True
+        for index, record_pages in pages.items():
+            record_isins = []
+            for page in record_pages:
+                try:
+                    isins_data = page.result()
+                except Exception as e:
+                    # Keep the ISINs from pages before the failed one
+                    logger.error("Error fetching ISINs: %s", e, exc_info=True)
+                    failed = True
+                    break
+                record_isins.extend(
+                    isin_item.get("attributes", {}).get("isin") for isin_item in isins_data.get("data", [])
                 )
-                logger.info(f"Retrieved {len(entities)} results before failure")
-                break
-            except (KeyError, ValueError) as e:
-                logger.error(f"Error parsing API response: {e}", exc_info=True)
-                break
+            else:
+                if index not in truncated and leis[index]:
+                    self._cache_put(
+                        self._isin_cache,
+                        leis[index],
+                        record_isins,
+                        now + APIConfig.INSTRUMENT_CACHE_TTL_SECONDS,
+                        APIConfig.ISIN_CACHE_MAXSIZE,
+                    )
+            isins[index] = record_isins
+
+        for index, ((_, entity_info), (_, bic)) in enumerate(zip(records, links)):
+            instruments = [{"type": "ISIN", "value": isin} for isin in isins.get(index, ())]
+            if bic:
+                instruments.append({
+                    "type": "BIC",
+                    "value": bic
+                })
+            entity_info["tickers_and_instruments"] = instruments if instruments else None
+        return not (budget_exhausted or failed)
+
+    def _fetch_search_page(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        page_num: int,
+    ) -> Dict[str, Any]:
+        """
+        Fetch and decode one page of search results.
 
-        logger.info(f"Search complete: {len(entities)} entities found")
-        return entities
+        Only the first page goes through the response cache. Repeated searches
+        are served by the search-result cache, and caching every later page
+        would keep a whole streamed search in memory.
+
+        Args:
+            url: Search endpoint URL
+            params: Query parameters shared by every page
+            page_num: Page number to fetch
+
+        Returns:
+            Decoded JSON:API response body, trimmed by _trim_search_page
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            ValueError: If the response is not valid JSON
+        """
+        params = {**params, "page[number]": page_num}
+        if page_num > 1:
+            return self._get_json(url, params, transform=self._trim_search_page)
+        return self._cached_json(
+            url, params, APIConfig.SEARCH_CACHE_TTL_SECONDS, transform=self._trim_search_page
+        )
+
+    @staticmethod
+    def _trim_search_page(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep only the parts of a search page that the extractors read.
+
+        Pages stay cached and in flight while earlier pages are processed, so
+        links, unread attributes and other relationships are dropped as soon
+        as a page is decoded. Records of unexpected shape are kept as-is.
+
+        Args:
+            data: Decoded JSON:API response body
+
+        Returns:
+            Body with the record list and pagination metadata
+        """
+        records = []
+        for item in data.get("data") or []:
+            attributes = item.get("attributes") if isinstance(item, dict) else None
+            if not isinstance(attributes, dict):
+                records.append(item)
+                continue
+            trimmed = {"attributes": {
+                field: attributes[field] for field in SearchConfig.LEI_RECORD_FIELDS if field in attributes
+            }}
+            isins = (item.get("relationships") or {}).get("isins")
+            if isins:
+                trimmed["relationships"] = {"isins": isins}
+            records.append(trimmed)
+        return {
+            "data": records,
+            "meta": {"pagination": (data.get("meta") or {}).get("pagination", {})},
+        }
+
+    def _fetch_first_search_page(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        page_num: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Fetch the first page of a search, adapting the request if the API rejects it.
+
+        A rejected page size is halved until accepted, and rejected sparse
+        fieldsets are dropped. Only 400s whose JSON:API errors name the
+        ``page[size]`` or ``fields`` parameter are adapted to; any other error
+        is raised. ``params`` is updated in place, so later pages are requested
+        with the accepted parameters too.
+
+        Args:
+            url: Search endpoint URL
+            params: Query parameters shared by every page
+            page_num: Page to start from (default: 1)
+
+        Returns:
+            Decoded JSON:API response body for the first page
+        """
+        while True:
+            try:
+                return self._fetch_search_page(url, params, page_num)
+            except requests.exceptions.HTTPError as e:
+                response = e.response
+                if response is None or response.status_code != 400:
+                    raise
+                rejected = rejected_parameters(response)
+                # Resumed searches keep their page size so page numbers stay valid
+                if page_num == 1 and params["page[size]"] > 1 and "page[size]" in rejected:
+                    params["page[size]"] //= 2
+                    self.page_size = min(self.page_size, params["page[size]"])
+                    logger.warning(
+                        "Page size rejected by API; retrying with page[size]=%d", params["page[size]"]
+                    )
+                elif "fields[lei-records]" in params and rejected & {"fields", "fields[lei-records]"}:
+                    logger.warning("API rejected lei-records fieldsets; requesting full records")
+                    GLEIFSearcher._rejected_fieldsets.add("lei-records")
+                    del params["fields[lei-records]"]
+                else:
+                    raise
+
+    def _cached_json(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        ttl_seconds: float,
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        GET a URL and decode its JSON body, reusing a recent identical response.
+
+        Args:
+            url: URL to request
+            params: Query parameters
+            ttl_seconds: How long a decoded response stays reusable
+            transform: Optional function applied to the decoded body before
+                it is cached and returned
+
+        Returns:
+            Decoded JSON response body
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            ValueError: If the response is not valid JSON
+        """
+        key = (url, tuple(sorted(params.items())))
+        now = time.monotonic()
+        cached = self._cache_get(self._cache, key, now)
+        if cached is not None:
+            return cached
+
+        data = self._get_json(url, params, transform)
+        self._cache_put(self._cache, key, data, now + ttl_seconds, APIConfig.RESPONSE_CACHE_MAXSIZE)
+        return data
+
+    def _get_json(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        GET a URL and decode its JSON body, bypassing the response cache.
+
+        Args:
+            url: URL to request
+            params: Query parameters
+            transform: Optional function applied to the decoded body
+
+        Returns:
+            Decoded JSON response body
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            ValueError: If the response is not valid JSON
+        """
+        response = self._get_with_backoff(url, params=params)
+        response.raise_for_status()
+        data = json_loads(response.content)
+        return transform(data) if transform is not None else data
+
+    def _cache_get(self, cache: OrderedDict, key: Any, now: float) -> Any:
+        """
+        Look up an unexpired entry in one of the TTL/LRU caches.
+
+        Args:
+            cache: Cache mapping keys to (expires_at, value), oldest first
+            key: Entry key
+            now: Current time.monotonic() reading
+
+        Returns:
+            Cached value, or None if absent or expired
+        """
+        with self._cache_lock:
+            cached = cache.get(key)
+            if cached is None:
+                return None
+            if cached[0] > now:
+                cache.move_to_end(key)
+                return cached[1]
+            del cache[key]
+            return None
+
+    def _cache_put(self, cache: OrderedDict, key: Any, value: Any, expires_at: float, maxsize: int) -> None:
+        """
+        Store an entry in one of the TTL/LRU caches, evicting the least recently used.
+
+        Args:
+            cache: Cache mapping keys to (expires_at, value), oldest first
+            key: Entry key
+            value: Value to cache
+            expires_at: time.monotonic() reading after which the entry is stale
+            maxsize: Max entries to keep
+        """
+        with self._cache_lock:
+            cache[key] = (expires_at, value)
+            cache.move_to_end(key)
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
 
     def _validate_search_params(
         self,
@@ -192,23 +852,30 @@ class GLEIFSearcher:
             )
         
         if country:
-            if not isinstance(country, str) or len(country) != SearchConfig.COUNTRY_CODE_LENGTH:
+            if (
+                not isinstance(country, str)
+                or len(country) != SearchConfig.COUNTRY_CODE_LENGTH
+                or not (country.isascii() and country.isalpha())
+            ):
                 raise GLEIFValidationError(
                     f"Invalid country code '{country}'. "
                     f"Must be a 2-letter ISO country code."
                 )
 
-    def _extract_lei_record_info(
-        self,
-        record: Dict[str, Any],
-        include_instruments: bool,
-    ) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _normalize_country(country: Optional[str]) -> Optional[str]:
+        """Return a validated country code in the API's uppercase form, or None."""
+        return country.upper() if country else None
+
+    def _extract_lei_record_info(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Extract relevant information from a lei-records result.
 
+        Instruments are not looked up here; _add_financial_instruments adds
+        them for a whole page of extracted records at once.
+
         Args:
             record: Raw LEI record from response
-            include_instruments: Whether to include BIC/ISIN enrichment
 
         Returns:
             Structured entity information or None if extraction fails
@@ -216,7 +883,7 @@ class GLEIFSearcher:
         # Type validation
         if not isinstance(record, dict):
             logger.warning(
-                f"Expected dict record, got {type(record).__name__}. Skipping."
+                "Expected dict record, got %s. Skipping.", type(record).__name__
             )
             return None
         
@@ -228,177 +895,182 @@ class GLEIFSearcher:
             if not lei:
                 return None
 
-            # Extract the information we need
-            registration = attributes.get("registration", {})
+            # Extract the information we need in one pass over the legal address.
+            # Country, region and jurisdiction codes repeat across most records,
+            # so interning them lets every result share one string per code
+            registration = attributes.get("registration") or {}
+            legal_address = entity.get("legalAddress") or {}
+            country = self._intern(legal_address.get("country"))
+            address = {}
+            for key, field in SearchConfig.ADDRESS_FIELDS:
+                value = legal_address.get(field)
+                if value:
+                    address[key] = value
             entity_info = {
                 "legal_entity_id": lei,
                 "legal_entity_name": entity.get("legalName"),
-                "region": self._extract_region(entity),
-                "country": self._extract_country(entity),
-                "country_of_jurisdiction": self._extract_jurisdiction(entity, registration),
-                "address": self._extract_address(entity)
+                "region": self._intern(legal_address.get("region")),
+                "country": country,
+                "country_of_jurisdiction": self._intern(registration.get("jurisdiction")) or country,
+                "address": address if address else None
             }
-            if include_instruments:
-                entity_info["tickers_and_instruments"] = self._extract_financial_instruments(record)
 
             return entity_info
 
         except Exception as e:
-            logger.error(f"Error extracting LEI record info: {e}", exc_info=True)
+            logger.error("Error extracting LEI record info: %s", e, exc_info=True)
             return None
 
+    @staticmethod
+    def _intern(value: Any) -> Any:
+        """Intern short code strings so repeated values share one object."""
+        return sys.intern(value) if isinstance(value, str) else value
 
-    def _fetch_lei_record(self, lei: str) -> Optional[Dict[str, Any]]:
-        """
-        Fetch the complete LEI record for a given LEI.
-
-        Args:
-            lei: The LEI code to fetch
-
-        Returns:
-            Structured entity information or None if fetch fails
+    def _get_with_backoff(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
         """
-        pass  # Deprecated - use search_entities() instead
-
+        GET on the session, whose adapter retries transient failures.
 
-    def _extract_region(self, entity: Dict[str, Any]) -> Optional[str]:
-        """Extract region information from entity data."""
-        legal_address = entity.get("legalAddress", {})
-        return legal_address.get("region")
+        Session-level preparation (header merging, netrc and proxy
+        environment lookups) is done once per URL origin and reused, so each
+        page request only encodes its own URL and cookies. Search pages and
+        every entity's ISIN link share one template.
 
-    def _extract_country(self, entity: Dict[str, Any]) -> Optional[str]:
-        """Extract country information from entity data."""
-        legal_address = entity.get("legalAddress", {})
-        return legal_address.get("country")
-
-    def _extract_jurisdiction(
-        self,
-        entity: Dict[str, Any],
-        registration: Dict[str, Any],
-    ) -> Optional[str]:
-        """Extract jurisdiction information from entity data."""
-        # Jurisdiction is typically the country of legal address
-        legal_address = entity.get("legalAddress", {})
-        country = legal_address.get("country")
-        
-        # Try to get more specific jurisdiction info if available
-        jurisdiction = registration.get("jurisdiction")
-        
-        return jurisdiction or country
+        Dropped connections and rate-limit statuses are retried by urllib3
+        with jittered exponential backoff, honoring Retry-After. Once retries
+        are exhausted the last response is returned.
 
-    def _extract_address(self, entity: Dict[str, Any]) -> Optional[Dict[str, str]]:
-        """Extract address information from entity data."""
-        legal_address = entity.get("legalAddress", {})
-
-        if not legal_address:
-            return None
-
-        address = {}
-        if legal_address.get("firstAddressLine"):
-            address["street"] = legal_address.get("firstAddressLine")
-        if legal_address.get("additionalAddressLine"):
-            address["additional"] = legal_address.get("additionalAddressLine")
-        if legal_address.get("city"):
-            address["city"] = legal_address.get("city")
-        if legal_address.get("postalCode"):
-            address["postal_code"] = legal_address.get("postalCode")
-        if legal_address.get("country"):
-            address["country"] = legal_address.get("country")
-
-        return address if address else None
-
-    def _get_with_backoff(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
-        """
-        GET with simple retry/backoff for transient errors.
-        
         Args:
             url: URL to request
             params: Query parameters
-            
+
         Returns:
             Response object
-            
-        Raises:
-            GLEIFNetworkError: If all retry attempts fail
-        """
-        for attempt in range(self.max_retries + 1):
-            response = self.session.get(url, params=params, timeout=APIConfig.TIMEOUT_SECONDS)
-            if response.status_code not in APIConfig.RATE_LIMIT_CODES:
-                return response
-            if attempt < self.max_retries:
-                delay = self.backoff_base_seconds * (2 ** attempt)
-                logger.warning(
-                    f"Rate limited (status {response.status_code}). "
-                    f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})"
-                )
-                time.sleep(delay)
-        return response
 
-    def _extract_financial_instruments(self, record: Dict[str, Any]) -> Optional[List[Dict[str, str]]]:
-        """Extract ticker symbols and financial instruments associated with the entity."""
-        instruments = []
+        Raises:
+            requests.exceptions.RequestException: If the request cannot be completed
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        template = self._request_templates.get(origin)
+        if template is None:
+            prepared = self.session.prepare_request(requests.Request("GET", url))
+            prepared.headers.pop("Cookie", None)
+            settings = self.session.merge_environment_settings(url, {}, None, None, None)
+            # Concurrent workers may both build it; either copy is equivalent
+            template = self._request_templates[origin] = (prepared, settings)
+
+        prepared, settings = template
+        request = prepared.copy()
+        request.prepare_url(url, params)
+        request.prepare_cookies(self.session.cookies)
+        return self.session.send(request, timeout=APIConfig.TIMEOUT_SECONDS, **settings)
+
+    def _take_instrument_request(self) -> bool:
+        """Claim one instrument lookup from the budget; False once it is exhausted."""
+        with self._budget_lock:
+            if self.instrument_request_budget <= 0:
+                return False
+            self.instrument_request_budget -= 1
+            return True
 
-        # Try to get ISINs from related data
+    @staticmethod
+    def _collect_instrument_links(record: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """Return a record's ISIN related-resource link and BIC, either of which may be None."""
         relationships = record.get("relationships", {})
-        if "isins" in relationships:
-            isins_link = relationships["isins"].get("links", {}).get("related")
-            if isins_link:
-                try:
-                    page_num = 1
-                    while True:
-                        if self.instrument_request_budget <= 0:
-                            logger.warning("Instrument lookup budget exhausted; stopping ISIN enrichment.")
-                            break
-                        params = {
-                            "page[number]": page_num,
-                            "page[size]": APIConfig.INSTRUMENT_PAGE_SIZE,
-                        }
-                        response = self._get_with_backoff(isins_link, params=params)
-                        self.instrument_request_budget -= 1
-                        response.raise_for_status()
-                        isins_data = response.json()
-
-                        for isin_item in isins_data.get("data", []):
-                            isin_attrs = isin_item.get("attributes", {})
-                            instruments.append({
-                                "type": "ISIN",
-                                "value": isin_attrs.get("isin")
-                            })
-
-                        meta = isins_data.get("meta", {})
-                        pagination = meta.get("pagination", {})
-                        if self._should_stop_pagination(pagination, page_num):
-                            break
+        isins_link = relationships.get("isins", {}).get("links", {}).get("related")
+        bic = record.get("attributes", {}).get("bic")
+        return isins_link, bic
 
-                        page_num += 1
-                except Exception as e:
-                    logger.error(f"Error fetching ISINs: {e}", exc_info=True)
+    def _fetch_isin_page(self, isins_link: str, page_num: int) -> Dict[str, Any]:
+        """
+        Fetch and decode one page of an entity's ISINs.
 
-        # Try to get BIC codes
-        attributes = record.get("attributes", {})
-        bic = attributes.get("bic")
-        if bic:
-            instruments.append({
-                "type": "BIC",
-                "value": bic
-            })
+        Only the isin field is requested until the API rejects the isins
+        fieldset, after which ISIN pages are requested in full. Search pages
+        keep their own lei-records fieldset.
 
-        return instruments if instruments else None
+        Args:
+            isins_link: Related-resource URL of the entity's ISINs
+            page_num: Page number to fetch
+
+        Returns:
+            Decoded JSON:API response body
+        """
+        params = {
+            "page[number]": page_num,
+            "page[size]": APIConfig.INSTRUMENT_PAGE_SIZE,
+        }
+        if "isins" not in GLEIFSearcher._rejected_fieldsets:
+            try:
+                return self._cached_json(
+                    isins_link,
+                    {**params, "fields[isins]": ",".join(SearchConfig.ISIN_FIELDS)},
+                    APIConfig.INSTRUMENT_CACHE_TTL_SECONDS,
+                )
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or not rejected_parameters(e.response) & {"fields", "fields[isins]"}:
+                    raise
+                logger.warning("API rejected isins fieldsets; requesting full records")
+                GLEIFSearcher._rejected_fieldsets.add("isins")
+        return self._cached_json(isins_link, params, APIConfig.INSTRUMENT_CACHE_TTL_SECONDS)
 
     @staticmethod
-    def _should_stop_pagination(pagination: Dict[str, Any], current_page: int) -> bool:
+    def _should_stop_pagination(
+        pagination: Dict[str, Any],
+        current_page: int,
+        item_count: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ) -> bool:
         """
         Determine if pagination should stop.
+
+        A page holding fewer items than the page size is always the last one,
+        which saves a round-trip when lastPage is missing or misreported.
         
         Args:
             pagination: Pagination metadata from API response
             current_page: Current page number
+            item_count: Number of items on the current page, if known
+            page_size: Requested page size, if known
             
         Returns:
             True if pagination should stop, False otherwise
         """
+        # Prefer the server's page size in case it capped the requested one
+        per_page = pagination.get("perPage") or page_size
+        if item_count is not None and per_page and item_count < per_page:
+            return True
         last_page = pagination.get("lastPage")
-        return not last_page or last_page == current_page
+        if not last_page:
+            return True
+        return pagination.get("currentPage", current_page) >= last_page
+
+
+def _encode_result(result: Dict[str, Any]) -> bytes:
+    """Encode one result as it appears, indented, in the CLI's results array."""
+    return b"    " + json_dumps(result, indent=True).replace(b"\n", b"\n    ")
+
+
+def _write_search_output(stream, header: Dict[str, Any], encoded_results: List[bytes]) -> None:
+    """
+    Write the CLI's JSON document from already-encoded results.
+
+    The bytes match encoding ``{**header, "results": results}`` in one go,
+    without holding the decoded results until the end.
+
+    Args:
+        stream: Binary stream to write to
+        header: Fields written before the results array
+        encoded_results: Results encoded by _encode_result
+    """
+    # Reopen the header object to append the results array as its last field
+    stream.write(json_dumps(header, indent=True)[:-2])
+    if encoded_results:
+        stream.write(b',\n  "results": [\n')
+        stream.write(b",\n".join(encoded_results))
+        stream.write(b"\n  ]\n}\n")
+    else:
+        stream.write(b',\n  "results": []\n}\n')
 
 
 def main():
@@ -448,6 +1120,29 @@ Examples:
         default=APIConfig.DEFAULT_INSTRUMENT_BUDGET,
         help=f"Max number of instrument lookup requests (default: {APIConfig.DEFAULT_INSTRUMENT_BUDGET})."
     )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=APIConfig.SEARCH_PAGE_SIZE,
+        help=f"Results per API request, up to {APIConfig.MAX_PAGE_SIZE} (default: {APIConfig.SEARCH_PAGE_SIZE})."
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write each result as a JSON line as soon as it is retrieved, "
+             "instead of one JSON document at the end."
+    )
+    parser.add_argument(
+        "--count-only",
+        action="store_true",
+        help="Only report how many entities match, using a single small request"
+    )
+    parser.add_argument(
+        "--resume-file",
+        metavar="PATH",
+        help="Save the search position to PATH if a request fails, and resume "
+             "from it when PATH exists. The file is removed once the search completes."
+    )
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
@@ -468,35 +1163,99 @@ Examples:
         query = args.query
         search_type = "fulltext" if args.fulltext else "name"
 
-        logger.info(f"Searching for: {query}")
-        logger.info(f"Search type: {'Full-text (name, address, metadata)' if args.fulltext else 'Legal entity name only'}")
-        if args.country:
-            logger.info(f"Country filter: {args.country.upper()}")
-
-        searcher = GLEIFSearcher(instrument_request_budget=args.instrument_request_budget)
-        results = searcher.search_entities(
-            query,
-            search_type=search_type,
-            country_of_jurisdiction=args.country,
-            include_instruments=args.include_instruments,
+        logger.info("Searching for: %s", query)
+        logger.info(
+            "Search type: %s",
+            "Full-text (name, address, metadata)" if args.fulltext else "Legal entity name only"
         )
+        country = GLEIFSearcher._normalize_country(args.country)
+        if country:
+            logger.info("Country filter: %s", country)
+
+        with GLEIFSearcher(
+            page_size=args.page_size,
+            instrument_request_budget=args.instrument_request_budget,
+        ) as searcher:
+            if args.count_only:
+                output = {
+                    "query": query,
+                    "search_type": search_type,
+                    "country_filter": country,
+                    "results_count": searcher.count_entities(
+                        query, search_type=search_type, country_of_jurisdiction=args.country
+                    ),
+                }
+                sys.stdout.buffer.write(json_dumps(output, indent=True) + b"\n")
+                return
+
+            resume_state = None
+            if args.resume_file:
+                resume_state = {}
+                if os.path.exists(args.resume_file):
+                    with open(args.resume_file, "rb") as f:
+                        resume_state = json_loads(f.read())
+                    logger.info("Resuming from page %s", resume_state.get("next_page", 1))
+
+            # Each result is encoded as it arrives, so the document is
+            # serialized in a single pass once the count is known
+            encoded_results = []
+            interrupted = None
+            complete = False
+            results = searcher.iter_entities(
+                query,
+                search_type=search_type,
+                country_of_jurisdiction=args.country,
+                include_instruments=args.include_instruments,
+                resume_state=resume_state,
+            )
+            try:
+                while True:
+                    try:
+                        result = next(results)
+                    except StopIteration as stop:
+                        # The search reports whether every page was retrieved and enriched
+                        complete = bool(stop.value)
+                        break
+                    if args.stream:
+                        # One JSON object per line, written as each page arrives
+                        sys.stdout.buffer.write(json_dumps(result) + b"\n")
+                        sys.stdout.buffer.flush()
+                    else:
+                        encoded_results.append(_encode_result(result))
+            except GLEIFResumableError as e:
+                interrupted = e
+
+        if args.resume_file:
+            if interrupted:
+                with open(args.resume_file, "wb") as f:
+                    f.write(json_dumps(interrupted.resume_state, indent=True) + b"\n")
+                logger.error(
+                    "Search interrupted on page %d; rerun with --resume-file %s to continue",
+                    interrupted.next_page, args.resume_file
+                )
+            elif complete and os.path.exists(args.resume_file):
+                os.remove(args.resume_file)
 
         # Format output as JSON
-        output = {
-            "query": query,
-            "search_type": search_type,
-            "country_filter": args.country.upper() if args.country else None,
-            "results_count": len(results),
-            "results": results
-        }
-
-        print(json.dumps(output, indent=2))
+        if not args.stream:
+            header = {
+                "query": query,
+                "search_type": search_type,
+                "country_filter": country,
+                "results_count": len(encoded_results),
+            }
+            _write_search_output(sys.stdout.buffer, header, encoded_results)
+            sys.stdout.buffer.flush()
+        if not complete:
+            if not interrupted:
+                logger.error("Search did not complete; the results are partial")
+            sys.exit(1)
 
     except GLEIFValidationError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         sys.exit(1)
 
 
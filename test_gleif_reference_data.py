@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Unit tests for gleif_reference_data.py
+
+Tests cover:
+- Bulk fetching of all endpoints
+- Summary and per-endpoint file output
+- Error handling per endpoint
+- ETag revalidation
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from gleif_config import APIConfig
+from gleif_http import create_session
+from gleif_json import json_dumps
+from gleif_reference_data import GLEIFReferenceDataFetcher
+
+
+def _mock_response(payload, status_code=200):
+    """Build a mock response carrying the JSON payload as raw bytes."""
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {}
+    response.content = json_dumps(payload)
+    return response
+
+
+class TestFetchAllData(unittest.TestCase):
+    """Test fetching all reference data endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+        self.fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_all_fetches_every_endpoint(self, mock_get):
+        """Test every endpoint is fetched and saved."""
+        mock_get.side_effect = lambda url, **kwargs: _mock_response({
+            "data": [{"id": "GB", "attributes": {"name": "United Kingdom"}}],
+            "meta": {"pagination": {"lastPage": 1}}
+        })
+
+        summary = self.fetcher.fetch_all_data()
+
+        self.assertEqual(mock_get.call_count, len(self.fetcher.endpoints))
+        self.assertEqual(list(summary["files_saved"]), list(self.fetcher.endpoints))
+        for name, info in summary["files_saved"].items():
+            self.assertEqual(info["count"], 1)
+            with open(os.path.join(self.output_dir, f"{name}.json")) as f:
+                saved = json.load(f)
+            self.assertEqual(saved["type"], name)
+            self.assertEqual(saved["timestamp"], summary["timestamp"])
+            self.assertEqual(saved["count"], 1)
+            self.assertEqual(saved["items"], [{"id": "GB", "name": "United Kingdom"}])
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_all_records_endpoint_errors(self, mock_get):
+        """Test a failing endpoint is recorded without aborting the others."""
+        failing_url = self.fetcher.endpoints["regions"]["url"]
+
+        def fetch(url, **kwargs):
+            if url == failing_url:
+                raise ValueError("boom")
+            return _mock_response({"data": [{"id": "X"}], "meta": {}})
+
+        mock_get.side_effect = fetch
+
+        summary = self.fetcher.fetch_all_data()
+
+        self.assertEqual(summary["files_saved"]["regions"], {"error": "boom"})
+        self.assertEqual(summary["files_saved"]["countries"]["count"], 1)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_all_writes_summary(self, mock_get):
+        """Test the summary file is written to the output directory."""
+        mock_get.side_effect = lambda url, **kwargs: _mock_response({"data": [{"id": "X"}], "meta": {}})
+
+        summary = self.fetcher.fetch_all_data()
+
+        with open(os.path.join(self.output_dir, "_summary.json")) as f:
+            saved = json.load(f)
+        self.assertEqual(saved["files_saved"], summary["files_saved"])
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._fetch_and_save_endpoint')
+    def test_fetch_all_keeps_partial_summary_when_interrupted(self, mock_fetch):
+        """Test an interrupted run leaves its partial summary in place."""
+        def fetch(name, info, timestamp):
+            if name == "regions":
+                raise KeyboardInterrupt
+            return {"filename": f"{name}.json", "count": 1, "filepath": f"{name}.json"}
+
+        mock_fetch.side_effect = fetch
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.fetcher.fetch_all_data()
+
+        self.assertEqual(os.listdir(self.output_dir), ["_summary.json.partial"])
+        with open(os.path.join(self.output_dir, "_summary.json.partial")) as f:
+            self.assertIn('"files_saved": {', f.read())
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_all_skips_empty_endpoints(self, mock_get):
+        """Test endpoints without items leave no file behind."""
+        mock_get.side_effect = lambda url, **kwargs: _mock_response({"data": [], "meta": {}})
+
+        summary = self.fetcher.fetch_all_data()
+
+        self.assertEqual(summary["files_saved"], {})
+        self.assertEqual(os.listdir(self.output_dir), ["_summary.json"])
+
+
+class TestConditionalFetch(unittest.TestCase):
+    """Test ETag revalidation of saved reference files."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+        self.fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+        self.endpoint_info = self.fetcher.endpoints["countries"]
+        self.filepath = os.path.join(self.output_dir, "countries.json")
+        self.etag_path = os.path.join(self.output_dir, "countries.etag")
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_single_page_fetch_saves_etag(self, mock_get):
+        """Test the ETag of a single-page endpoint is saved with its count."""
+        response = _mock_response({"data": [{"id": "GB"}], "meta": {"pagination": {"lastPage": 1}}})
+        response.headers = {"ETag": '"abc"'}
+        mock_get.return_value = response
+
+        self.fetcher._fetch_and_save_endpoint("countries", self.endpoint_info, "2024-01-01T00:00:00Z")
+
+        with open(self.etag_path) as f:
+            self.assertEqual(json.load(f), {"etag": '"abc"', "count": 1})
+        self.assertIsNone(mock_get.call_args[1]["headers"])
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_not_modified_keeps_saved_file(self, mock_get):
+        """Test a 304 reuses the saved file without rewriting it."""
+        with open(self.filepath, "w") as f:
+            f.write("saved")
+        with open(self.etag_path, "w") as f:
+            json.dump({"etag": '"abc"', "count": 250}, f)
+        mock_get.return_value = _mock_response({}, status_code=304)
+
+        saved = self.fetcher._fetch_and_save_endpoint("countries", self.endpoint_info, "2024-01-01T00:00:00Z")
+
+        self.assertEqual(saved["count"], 250)
+        self.assertEqual(mock_get.call_args[1]["headers"], {"If-None-Match": '"abc"'})
+        with open(self.filepath) as f:
+            self.assertEqual(f.read(), "saved")
+
+
+class TestStreamItemsToFile(unittest.TestCase):
+    """Test streaming item output."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+        self.fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+        self.filepath = os.path.join(self.output_dir, "countries.json")
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_stream_items_writes_valid_json(self):
+        """Test streamed output parses back to the envelope and items."""
+        header = {"type": "countries", "description": "ISO country codes and names"}
+        items = [{"id": "GB", "name": "United Kingdom"}, {"id": "FR", "name": "France"}]
+
+        count = self.fetcher._stream_items_to_file(self.filepath, header, iter(items))
+
+        self.assertEqual(count, 2)
+        with open(self.filepath) as f:
+            saved = json.load(f)
+        self.assertEqual(saved, {**header, "items": items, "count": 2})
+
+    def test_stream_items_empty(self):
+        """Test an empty item stream leaves the existing file untouched."""
+        with open(self.filepath, "w") as f:
+            f.write("saved")
+
+        count = self.fetcher._stream_items_to_file(self.filepath, {"type": "regions"}, iter([]))
+
+        self.assertEqual(count, 0)
+        with open(self.filepath) as f:
+            self.assertEqual(f.read(), "saved")
+        self.assertEqual(os.listdir(self.output_dir), ["countries.json"])
+
+    def test_stream_items_failure_keeps_previous_file(self):
+        """Test a failure mid-stream does not truncate the saved file."""
+        with open(self.filepath, "w") as f:
+            f.write("saved")
+
+        def items():
+            yield {"id": "GB"}
+            raise ValueError("connection lost")
+
+        with self.assertRaises(ValueError):
+            self.fetcher._stream_items_to_file(self.filepath, {"type": "countries"}, items())
+
+        with open(self.filepath) as f:
+            self.assertEqual(f.read(), "saved")
+        self.assertEqual(os.listdir(self.output_dir), ["countries.json"])
+
+
+class TestFetchEndpoint(unittest.TestCase):
+    """Test paginated endpoint fetching."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+        self.fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_endpoint_pagination(self, mock_get):
+        """Test pages are requested in order and items kept in page order."""
+        page_1 = _mock_response({
+            "data": [{"id": "AD", "attributes": {"name": "Andorra"}}],
+            "meta": {"pagination": {"lastPage": 2}}
+        })
+        page_2 = _mock_response({
+            "data": [{"id": "AE", "attributes": {"name": "United Arab Emirates"}}],
+            "meta": {"pagination": {"lastPage": 2}}
+        })
+        mock_get.side_effect = [page_1, page_2]
+
+        items, count = self.fetcher._fetch_endpoint("https://api.gleif.org/api/v1/countries", page_size=1)
+
+        self.assertEqual([item["id"] for item in items], ["AD", "AE"])
+        self.assertEqual(count, 2)
+        self.assertEqual(items[0]["name"], "Andorra")
+        pages = [call[1]["params"]["page[number]"] for call in mock_get.call_args_list]
+        self.assertEqual(pages, [1, 2])
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_endpoint_stops_on_empty_page(self, mock_get):
+        """Test an empty page ends pagination without further requests."""
+        mock_get.return_value = _mock_response({"data": [], "meta": {}})
+
+        items, count = self.fetcher._fetch_endpoint("https://api.gleif.org/api/v1/countries")
+
+        self.assertEqual(items, [])
+        self.assertEqual(count, 0)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_endpoint_stops_on_short_page(self, mock_get):
+        """Test a page smaller than the page size ends pagination."""
+        mock_get.return_value = _mock_response({
+            "data": [{"id": "AD", "attributes": {}}],
+            "meta": {"pagination": {"currentPage": 1, "lastPage": 3}}
+        })
+
+        items, count = self.fetcher._fetch_endpoint("https://api.gleif.org/api/v1/countries", page_size=2)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_endpoint_halves_rejected_page_size(self, mock_get):
+        """Test a rejected page size is halved for that endpoint only."""
+        rejected = _mock_response(
+            {"errors": [{
+                "status": "400",
+                "detail": "page[size] must not exceed 100",
+                "source": {"parameter": "page[size]"}
+            }]},
+            status_code=400,
+        )
+        page = _mock_response({
+            "data": [{"id": "GB", "attributes": {}}],
+            "meta": {"pagination": {"lastPage": 1}}
+        })
+        mock_get.side_effect = [rejected, page]
+
+        items, count = self.fetcher._fetch_endpoint("https://api.gleif.org/api/v1/countries", page_size=200)
+
+        self.assertEqual(items, [{"id": "GB"}])
+        sizes = [call[1]["params"]["page[size]"] for call in mock_get.call_args_list]
+        self.assertEqual(sizes, [200, 100])
+        self.assertEqual(self.fetcher.page_size, APIConfig.REFERENCE_PAGE_SIZE)
+
+    @patch('gleif_reference_data.GLEIFReferenceDataFetcher._get')
+    def test_fetch_endpoint_keeps_page_size_on_unrelated_rejection(self, mock_get):
+        """Test a 400 that does not name page[size] is not retried smaller."""
+        mock_get.return_value = _mock_response(
+            {"errors": [{"status": "400", "detail": "Invalid page cursor"}]},
+            status_code=400,
+        )
+
+        items, count = self.fetcher._fetch_endpoint("https://api.gleif.org/api/v1/countries", page_size=200)
+
+        self.assertEqual(items, [])
+        mock_get.assert_called_once()
+
+
+class TestGet(unittest.TestCase):
+    """Test the prepared-request GET helper."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+        # A private session keeps cookies set here out of the shared one
+        session = create_session("GLEIF-Reference-Data-Tool/1.0")
+        self.fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir, session=session)
+        self.url = "https://api.gleif.org/api/v1/countries"
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_get_reuses_prepared_template(self):
+        """Test pages of one URL share a template but carry their own params."""
+        with patch.object(self.fetcher.session, "send") as mock_send, \
+                patch.object(self.fetcher.session, "prepare_request",
+                             wraps=self.fetcher.session.prepare_request) as mock_prepare:
+            self.fetcher._get(self.url, params={"page[number]": 1, "page[size]": 200})
+            self.fetcher._get(
+                self.url,
+                params={"page[number]": 2, "page[size]": 200},
+                headers={"If-None-Match": '"abc"'},
+            )
+
+        self.assertEqual(mock_prepare.call_count, 1)
+        first, second = [call[0][0] for call in mock_send.call_args_list]
+        self.assertIn("page%5Bnumber%5D=1", first.url)
+        self.assertIn("page%5Bnumber%5D=2", second.url)
+        self.assertNotIn("If-None-Match", first.headers)
+        self.assertEqual(second.headers["If-None-Match"], '"abc"')
+        self.assertEqual(second.headers["User-Agent"], "GLEIF-Reference-Data-Tool/1.0")
+        self.assertEqual(mock_send.call_args[1]["timeout"], APIConfig.TIMEOUT_SECONDS)
+
+    def test_get_sends_current_session_cookies(self):
+        """Test cookies set after the template was built are still sent."""
+        with patch.object(self.fetcher.session, "send") as mock_send:
+            self.fetcher._get(self.url)
+            self.fetcher.session.cookies.set("__cf_bm", "token", domain="api.gleif.org")
+            self.fetcher._get(self.url)
+
+        first, second = [call[0][0] for call in mock_send.call_args_list]
+        self.assertNotIn("Cookie", first.headers)
+        self.assertEqual(second.headers["Cookie"], "__cf_bm=token")
+
+
+class TestFetcherInitialization(unittest.TestCase):
+    """Test fetcher initialization."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def test_init_max_workers_at_least_one(self):
+        """Test non-positive worker counts fall back to a single worker."""
+        fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir, max_workers=0)
+        self.assertEqual(fetcher.max_workers, 1)
+
+    def test_init_session_retries_rate_limits(self):
+        """Test the session adapter retries rate-limit and server errors."""
+        fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir, max_retries=2)
+        retry = fetcher.session.get_adapter(APIConfig.BASE_URL).max_retries
+        self.assertEqual(set(retry.status_forcelist), APIConfig.RATE_LIMIT_CODES)
+        self.assertEqual(retry.total, 2)
+        self.assertTrue(retry.respect_retry_after_header)
+
+    def test_init_session_jitters_backoff(self):
+        """Test retry backoff is jittered so concurrent workers spread out."""
+        fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir, backoff_base_seconds=0.25)
+        retry = fetcher.session.get_adapter(APIConfig.BASE_URL).max_retries
+        if not hasattr(retry, "backoff_jitter"):
+            self.skipTest("urllib3 Retry has no backoff_jitter")
+        self.assertEqual(retry.backoff_jitter, 0.25)
+
+    def test_init_shares_session_between_instances(self):
+        """Test fetchers with the same retry settings reuse one session."""
+        first = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+        second = GLEIFReferenceDataFetcher(output_dir=self.output_dir)
+        other = GLEIFReferenceDataFetcher(output_dir=self.output_dir, max_retries=1)
+        self.assertIs(first.session, second.session)
+        self.assertIsNot(first.session, other.session)
+
+    def test_init_uses_injected_session(self):
+        """Test an injected session replaces the shared one."""
+        session = Mock()
+        fetcher = GLEIFReferenceDataFetcher(output_dir=self.output_dir, session=session)
+        self.assertIs(fetcher.session, session)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,168 +3,241 @@
 Unit tests for gleif_search.py
 
 Tests cover:
-- Data extraction methods (_extract_* functions)
+- Data extraction (parametrized pytest cases)
 - Search parameter building
 - Error handling
 - Response parsing
 """
 
-import unittest
-from unittest.mock import Mock, MagicMock, patch
-import json
-from gleif_search import GLEIFSearcher
+import io
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from requests import Response, Session
+from requests.adapters import BaseAdapter
+
+from gleif_config import APIConfig
+from gleif_json import json_dumps, json_loads
+from gleif_search import GLEIFSearcher, _encode_result, _write_search_output, main
 from gleif_exceptions import (
     GLEIFValidationError,
     GLEIFNetworkError,
-    GLEIFAPIError
+    GLEIFResumableError
 )
 
 
-class TestGLEIFSearcherExtraction(unittest.TestCase):
-    """Test data extraction methods."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.searcher = GLEIFSearcher()
-
-    def test_extract_region_valid(self):
-        """Test region extraction with valid data."""
-        entity = {
-            "legalAddress": {
-                "region": "GB-LND",
-                "country": "GB"
-            }
-        }
-        result = self.searcher._extract_region(entity)
-        self.assertEqual(result, "GB-LND")
-
-    def test_extract_region_missing(self):
-        """Test region extraction when region is missing."""
-        entity = {"legalAddress": {"country": "GB"}}
-        result = self.searcher._extract_region(entity)
-        self.assertIsNone(result)
-
-    def test_extract_region_no_address(self):
-        """Test region extraction when legalAddress is missing."""
-        entity = {}
-        result = self.searcher._extract_region(entity)
-        self.assertIsNone(result)
-
-    def test_extract_country_valid(self):
-        """Test country extraction with valid data."""
-        entity = {"legalAddress": {"country": "US"}}
-        result = self.searcher._extract_country(entity)
-        self.assertEqual(result, "US")
-
-    def test_extract_country_missing(self):
-        """Test country extraction when country is missing."""
-        entity = {"legalAddress": {}}
-        result = self.searcher._extract_country(entity)
-        self.assertIsNone(result)
-
-    def test_extract_jurisdiction_from_registration(self):
-        """Test jurisdiction extraction from registration data."""
-        entity = {"legalAddress": {"country": "US"}}
-        registration = {"jurisdiction": "US-CA"}
-        result = self.searcher._extract_jurisdiction(entity, registration)
-        self.assertEqual(result, "US-CA")
-
-    def test_extract_jurisdiction_fallback_to_country(self):
-        """Test jurisdiction fallback to country when registration missing."""
-        entity = {"legalAddress": {"country": "GB"}}
-        registration = {}
-        result = self.searcher._extract_jurisdiction(entity, registration)
-        self.assertEqual(result, "GB")
-
-    def test_extract_jurisdiction_both_missing(self):
-        """Test jurisdiction when both registration and country are missing."""
-        entity = {"legalAddress": {}}
-        registration = {}
-        result = self.searcher._extract_jurisdiction(entity, registration)
-        self.assertIsNone(result)
-
-    def test_extract_address_complete(self):
-        """Test address extraction with all fields."""
-        entity = {
+# Canonical lei-records shared by the tests; the searcher never mutates its input
+_RECORD_CITIBANK = {
+    "attributes": {
+        "lei": "549300U8H3KN0K301B23",
+        "bic": "CIUKGB2LXXX",
+        "entity": {
+            "legalName": "CITIBANK UK LIMITED",
             "legalAddress": {
                 "firstAddressLine": "123 Main St",
-                "additionalAddressLine": "Suite 100",
                 "city": "London",
                 "postalCode": "E14 5LB",
-                "country": "GB"
+                "country": "GB",
+                "region": "GB-LND"
             }
+        },
+        "registration": {
+            "jurisdiction": "GB"
         }
-        result = self.searcher._extract_address(entity)
-        self.assertEqual(result["street"], "123 Main St")
-        self.assertEqual(result["additional"], "Suite 100")
-        self.assertEqual(result["city"], "London")
-        self.assertEqual(result["postal_code"], "E14 5LB")
-        self.assertEqual(result["country"], "GB")
-
-    def test_extract_address_partial(self):
-        """Test address extraction with partial data."""
-        entity = {
+    },
+    "relationships": {}
+}
+
+_RECORD_TEST_BANK = {
+    "attributes": {
+        "lei": "549300U8H3KN0K301B23",
+        "bic": "CIUKGB2LXXX",
+        "entity": {
+            "legalName": "TEST BANK",
             "legalAddress": {
-                "city": "New York",
-                "country": "US"
+                "city": "London",
+                "country": "GB"
             }
+        },
+        "registration": {}
+    },
+    "relationships": {}
+}
+
+_RECORD_BANK_1, _RECORD_BANK_2, _RECORD_BANK_3 = [
+    {
+        "attributes": {
+            "lei": f"LEI00{number}",
+            "entity": {
+                "legalName": f"Bank {number}",
+                "legalAddress": {"country": "GB"}
+            },
+            "registration": {}
         }
-        result = self.searcher._extract_address(entity)
-        self.assertEqual(result["city"], "New York")
-        self.assertEqual(result["country"], "US")
-        self.assertNotIn("street", result)
+    }
+    for number in (1, 2, 3)
+]
 
-    def test_extract_address_empty(self):
-        """Test address extraction with empty legalAddress."""
-        entity = {"legalAddress": {}}
-        result = self.searcher._extract_address(entity)
-        self.assertIsNone(result)
 
-    def test_extract_address_no_address(self):
-        """Test address extraction with missing legalAddress."""
-        entity = {}
-        result = self.searcher._extract_address(entity)
-        self.assertIsNone(result)
+# Complete legalAddress shared by the extraction cases; read-only, so cases
+# needing a different value overlay it with a ChainMap instead of copying it
+_BASE_ADDRESS = MappingProxyType({
+    "firstAddressLine": "123 Main St",
+    "additionalAddressLine": "Suite 100",
+    "city": "London",
+    "postalCode": "E14 5LB",
+    "country": "GB"
+})
 
 
-class TestGLEIFSearcherExtractRecord(unittest.TestCase):
-    """Test LEI record extraction."""
+# The only Response attributes the searcher reads; anything else is a test bug
+_RESPONSE_SPEC = ["content", "raise_for_status"]
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.searcher = GLEIFSearcher()
+
+def _json_response(payload):
+    """Build a mock response carrying the JSON-encoded payload as its body."""
+    return Mock(spec=_RESPONSE_SPEC, content=json_dumps(payload))
+
+
+class _RoutedAdapter(BaseAdapter):
+    """In-process transport answering GET requests from payloads keyed by URL path."""
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+        self.sent = []
+
+    def add(self, url, payload, status=200):
+        """Register (or replace) the response served for a URL, ignoring its query."""
+        self.routes[url] = (status, json_dumps(payload))
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        parts = urlsplit(request.url)
+        status, body = self.routes.get(
+            f"{parts.scheme}://{parts.netloc}{parts.path}", (404, b'{"errors": []}')
+        )
+        response = Response()
+        response.status_code = status
+        response._content = body
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _rejected_response(parameter):
+    """Build a mock 400 response whose JSON:API error points at a query parameter."""
+    error = {"status": "400", "detail": "Invalid parameter"}
+    if parameter is not None:
+        error["source"] = {"parameter": parameter}
+    response = Mock(spec=_RESPONSE_SPEC)
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        response=Mock(status_code=400, content=json_dumps({"errors": [error]}))
+    )
+    return response
+
+
+@pytest.fixture
+def mock_get(request, monkeypatch):
+    """Replace GLEIFSearcher._get_with_backoff with a Mock, exposed as mock_get."""
+    mock = Mock()
+    monkeypatch.setattr(GLEIFSearcher, "_get_with_backoff", mock)
+    if request.instance is not None:
+        request.instance.mock_get = mock
+    return mock
+
+
+@pytest.fixture
+def captured_params(monkeypatch):
+    """Stub _get_with_backoff with an empty result page, capturing the last request's params."""
+    captured = {}
+    response = _json_response({"data": [], "meta": {}})
+
+    def get(self, url, params=None):
+        captured.clear()
+        captured.update(params or {})
+        return response
+
+    monkeypatch.setattr(GLEIFSearcher, "_get_with_backoff", get)
+    return captured
+
+
+@pytest.fixture(scope="class")
+def class_searcher(request, default_searcher):
+    """Expose the session's default searcher to a read-only test class as cls.searcher."""
+    request.cls.searcher = default_searcher
+
+
+@pytest.mark.parametrize("entity,registration,field,expected", [
+    pytest.param({"legalAddress": ChainMap({"region": "GB-LND"}, _BASE_ADDRESS)}, {}, "region", "GB-LND",
+                 id="region-valid"),
+    pytest.param({"legalAddress": {"country": "GB"}}, {}, "region", None, id="region-missing"),
+    pytest.param({}, {}, "region", None, id="region-no-address"),
+    pytest.param({"legalAddress": ChainMap({"country": "US"}, _BASE_ADDRESS)}, {}, "country", "US",
+                 id="country-valid"),
+    pytest.param({"legalAddress": {}}, {}, "country", None, id="country-missing"),
+    pytest.param({"legalAddress": {"country": "US"}}, {"jurisdiction": "US-CA"},
+                 "country_of_jurisdiction", "US-CA", id="jurisdiction-from-registration"),
+    pytest.param({"legalAddress": {"country": "GB"}}, {}, "country_of_jurisdiction", "GB",
+                 id="jurisdiction-fallback-to-country"),
+    pytest.param({"legalAddress": {}}, {}, "country_of_jurisdiction", None, id="jurisdiction-both-missing"),
+    pytest.param(
+        {"legalAddress": _BASE_ADDRESS},
+        {},
+        "address",
+        {
+            "street": "123 Main St",
+            "additional": "Suite 100",
+            "city": "London",
+            "postal_code": "E14 5LB",
+            "country": "GB"
+        },
+        id="address-complete",
+    ),
+    pytest.param({"legalAddress": {"city": "New York", "country": "US"}}, {}, "address",
+                 {"city": "New York", "country": "US"}, id="address-partial"),
+    pytest.param({"legalAddress": {}}, {}, "address", None, id="address-empty"),
+    pytest.param({}, {}, "address", None, id="address-no-address"),
+])
+def test_extract_entity_field(default_searcher, entity, registration, field, expected):
+    """Test each output field is extracted from the entity and registration data."""
+    record = {"attributes": {"lei": "LEI001", "entity": entity, "registration": registration}}
+    result = default_searcher._extract_lei_record_info(record)
+    assert result[field] == expected
+
+
+@pytest.mark.usefixtures("class_searcher")
+class TestGLEIFSearcherExtractRecord:
+    """Test LEI record extraction."""
 
     def test_extract_lei_record_valid(self):
         """Test complete LEI record extraction."""
-        record = {
-            "attributes": {
-                "lei": "549300U8H3KN0K301B23",
-                "bic": "CIUKGB2LXXX",
-                "entity": {
-                    "legalName": "CITIBANK UK LIMITED",
-                    "legalAddress": {
-                        "firstAddressLine": "123 Main St",
-                        "city": "London",
-                        "postalCode": "E14 5LB",
-                        "country": "GB",
-                        "region": "GB-LND"
-                    }
-                },
-                "registration": {
-                    "jurisdiction": "GB"
-                }
-            },
-            "relationships": {}
-        }
-        result = self.searcher._extract_lei_record_info(record, include_instruments=False)
-        
-        self.assertEqual(result["legal_entity_id"], "549300U8H3KN0K301B23")
-        self.assertEqual(result["legal_entity_name"], "CITIBANK UK LIMITED")
-        self.assertEqual(result["region"], "GB-LND")
-        self.assertEqual(result["country"], "GB")
-        self.assertEqual(result["country_of_jurisdiction"], "GB")
-        self.assertIsNotNone(result["address"])
-        self.assertEqual(result["address"]["city"], "London")
+        result = self.searcher._extract_lei_record_info(_RECORD_CITIBANK)
+
+        assert result["legal_entity_id"] == "549300U8H3KN0K301B23"
+        assert result["legal_entity_name"] == "CITIBANK UK LIMITED"
+        assert result["region"] == "GB-LND"
+        assert result["country"] == "GB"
+        assert result["country_of_jurisdiction"] == "GB"
+        assert result["address"] is not None
+        assert result["address"]["city"] == "London"
+
+    def test_extract_lei_record_shares_country_codes(self):
+        """Test identical country codes from different records are one object."""
+        records = [
+            json_loads('{"attributes": {"lei": "%s", "entity": {"legalAddress": {"country": "GB"}}}}' % lei)
+            for lei in ("LEI001", "LEI002")
+        ]
+        first, second = [self.searcher._extract_lei_record_info(r) for r in records]
+        assert first["country"] is second["country"]
 
     def test_extract_lei_record_missing_lei(self):
         """Test extraction fails gracefully when LEI is missing."""
@@ -174,58 +247,34 @@ class TestGLEIFSearcherExtractRecord(unittest.TestCase):
                 "registration": {}
             }
         }
-        result = self.searcher._extract_lei_record_info(record, include_instruments=False)
-        self.assertIsNone(result)
-
-    def test_extract_lei_record_with_instruments(self):
-        """Test extraction includes instruments when requested."""
-        record = {
-            "attributes": {
-                "lei": "549300U8H3KN0K301B23",
-                "bic": "CIUKGB2LXXX",
-                "entity": {
-                    "legalName": "TEST BANK",
-                    "legalAddress": {
-                        "city": "London",
-                        "country": "GB"
-                    }
-                },
-                "registration": {}
-            },
-            "relationships": {}
-        }
-        result = self.searcher._extract_lei_record_info(record, include_instruments=True)
-        
-        self.assertIn("tickers_and_instruments", result)
+        result = self.searcher._extract_lei_record_info(record)
+        assert result is None
 
     def test_extract_lei_record_malformed_json(self):
         """Test extraction handles malformed data gracefully."""
         record = {
             "attributes": None
         }
-        result = self.searcher._extract_lei_record_info(record, include_instruments=False)
-        self.assertIsNone(result)
+        result = self.searcher._extract_lei_record_info(record)
+        assert result is None
 
     def test_extract_lei_record_with_non_dict_type(self):
         """Test extraction handles non-dict record type."""
         record = "not a dict"
-        result = self.searcher._extract_lei_record_info(record, include_instruments=False)
-        self.assertIsNone(result)
+        result = self.searcher._extract_lei_record_info(record)
+        assert result is None
 
     def test_extract_lei_record_with_list_type(self):
         """Test extraction handles list record type."""
         record = [1, 2, 3]
-        result = self.searcher._extract_lei_record_info(record, include_instruments=False)
-        self.assertIsNone(result)
+        result = self.searcher._extract_lei_record_info(record)
+        assert result is None
 
 
-class TestGLEIFSearcherValidation(unittest.TestCase):
+@pytest.mark.usefixtures("class_searcher")
+class TestGLEIFSearcherValidation:
     """Test parameter validation."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.searcher = GLEIFSearcher()
-
     def test_validate_valid_parameters(self):
         """Test validation passes with valid parameters."""
         # Should not raise any exception
@@ -233,37 +282,43 @@ class TestGLEIFSearcherValidation(unittest.TestCase):
             self.searcher._validate_search_params("Citibank", "name", None)
             self.searcher._validate_search_params("Bank", "fulltext", "US")
         except GLEIFValidationError:
-            self.fail("_validate_search_params raised GLEIFValidationError unexpectedly")
+            pytest.fail("_validate_search_params raised GLEIFValidationError unexpectedly")
 
     def test_validate_invalid_search_type(self):
         """Test validation rejects invalid search type."""
-        with self.assertRaises(GLEIFValidationError) as context:
+        with pytest.raises(GLEIFValidationError) as context:
             self.searcher._validate_search_params("Query", "invalid_type", None)
-        self.assertIn("search_type", str(context.exception))
+        assert "search_type" in str(context.value)
 
     def test_validate_invalid_country_code_length(self):
         """Test validation rejects country code with wrong length."""
-        with self.assertRaises(GLEIFValidationError) as context:
+        with pytest.raises(GLEIFValidationError) as context:
             self.searcher._validate_search_params("Query", "name", "INVALID")
-        self.assertIn("country code", str(context.exception).lower())
+        assert "country code" in str(context.value).lower()
 
     def test_validate_invalid_country_code_single_letter(self):
         """Test validation rejects single-letter country code."""
-        with self.assertRaises(GLEIFValidationError) as context:
+        with pytest.raises(GLEIFValidationError) as context:
             self.searcher._validate_search_params("Query", "name", "U")
-        self.assertIn("country code", str(context.exception).lower())
+        assert "country code" in str(context.value).lower()
+
+    def test_validate_invalid_country_code_not_letters(self):
+        """Test validation rejects two-character codes that are not letters."""
+        for code in ("12", "G1", "É1"):
+            with pytest.raises(GLEIFValidationError):
+                self.searcher._validate_search_params("Query", "name", code)
 
     def test_validate_empty_query(self):
         """Test validation rejects empty query."""
-        with self.assertRaises(GLEIFValidationError) as context:
+        with pytest.raises(GLEIFValidationError) as context:
             self.searcher._validate_search_params("", "name", None)
-        self.assertIn("query", str(context.exception).lower())
+        assert "query" in str(context.value).lower()
 
     def test_validate_non_string_query(self):
         """Test validation rejects non-string query."""
-        with self.assertRaises(GLEIFValidationError) as context:
+        with pytest.raises(GLEIFValidationError) as context:
             self.searcher._validate_search_params(123, "name", None)
-        self.assertIn("query", str(context.exception).lower())
+        assert "query" in str(context.value).lower()
 
     def test_validate_valid_country_codes(self):
         """Test validation accepts valid 2-letter country codes."""
@@ -272,261 +327,508 @@ class TestGLEIFSearcherValidation(unittest.TestCase):
             try:
                 self.searcher._validate_search_params("Query", "name", code)
             except GLEIFValidationError:
-                self.fail(f"_validate_search_params rejected valid country code '{code}'")
+                pytest.fail(f"_validate_search_params rejected valid country code '{code}'")
 
 
-class TestGLEIFSearcherSearchParameters(unittest.TestCase):
+class TestGLEIFSearcherSearchParameters:
     """Test search parameter building and API requests."""
 
-    def setUp(self):
+    @classmethod
+    def setup_class(cls):
+        """Build the canned responses shared by the tests."""
+        cls.EMPTY_RESPONSE = _json_response({
+            "data": [],
+            "meta": {"pagination": {"lastPage": True, "page": 1}}
+        })
+
+    def setup_method(self):
         """Set up test fixtures."""
         self.searcher = GLEIFSearcher(page_size=100)
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
-    def test_search_name_mode(self, mock_get):
+    def test_search_name_mode(self, captured_params):
         """Test search builds correct parameters for name mode."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "data": [],
-            "meta": {"pagination": {"lastPage": True, "page": 1}}
-        }
-        mock_get.return_value = mock_response
-
         self.searcher.search_entities("Citibank", search_type="name")
 
         # Verify correct filter was used
-        call_args = mock_get.call_args
-        self.assertIn("filter[entity.legalName]", call_args[1]["params"])
-        self.assertEqual(call_args[1]["params"]["filter[entity.legalName]"], "Citibank")
+        assert captured_params["filter[entity.legalName]"] == "Citibank"
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
-    def test_search_fulltext_mode(self, mock_get):
+    def test_search_fulltext_mode(self, captured_params):
         """Test search builds correct parameters for fulltext mode."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "data": [],
-            "meta": {"pagination": {"lastPage": True, "page": 1}}
-        }
-        mock_get.return_value = mock_response
-
         self.searcher.search_entities("Citibank", search_type="fulltext")
 
-        call_args = mock_get.call_args
-        self.assertIn("filter[fulltext]", call_args[1]["params"])
-        self.assertEqual(call_args[1]["params"]["filter[fulltext]"], "Citibank")
+        assert captured_params["filter[fulltext]"] == "Citibank"
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
-    def test_search_with_country_filter(self, mock_get):
+    def test_search_with_country_filter(self, captured_params):
         """Test search includes country filter when provided."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "data": [],
-            "meta": {"pagination": {"lastPage": True, "page": 1}}
-        }
+        self.searcher.search_entities("Bank", country_of_jurisdiction="us")
+
+        assert captured_params["filter[entity.legalAddress.country]"] == "US"
+
+    def test_search_requests_sparse_fieldset(self, mock_get):
+        """Test search asks only for the fields it extracts."""
+        mock_get.return_value = self.EMPTY_RESPONSE
+
+        self.searcher.search_entities("Bank")
+        self.searcher.search_entities("Bank", include_instruments=True)
+
+        fields = [call[1]["params"]["fields[lei-records]"] for call in mock_get.call_args_list]
+        assert fields == ["lei,entity,registration,bic", "lei,entity,registration,bic,isins"]
+
+    def test_search_drops_rejected_sparse_fieldset(self, mock_get, monkeypatch):
+        """Test search retries without fieldsets if the API rejects them."""
+        monkeypatch.setattr(GLEIFSearcher, "_rejected_fieldsets", set())
+        rejected = _rejected_response("fields[lei-records]")
+        accepted = _json_response({
+            "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+            "meta": {}
+        })
+        mock_get.side_effect = iter([rejected, accepted])
+
+        results = self.searcher.search_entities("Bank")
+
+        assert len(results) == 1
+        assert "fields[lei-records]" not in mock_get.call_args[1]["params"]
+        assert GLEIFSearcher._rejected_fieldsets == {"lei-records"}
+
+    def test_search_keeps_sparse_fieldset_on_unrelated_rejection(self, mock_get, monkeypatch):
+        """Test a 400 for another parameter is raised without dropping fieldsets."""
+        monkeypatch.setattr(GLEIFSearcher, "_rejected_fieldsets", set())
+        mock_get.return_value = _rejected_response("filter[entity.legalName]")
+
+        results = self.searcher.search_entities("Bank")
+
+        assert results == []
+        mock_get.assert_called_once()
+        assert not GLEIFSearcher._rejected_fieldsets
+        assert self.searcher.page_size == 100
+
+    def test_count_entities_requests_one_record(self, mock_get):
+        """Test counting reads the total from a single one-record page."""
+        mock_response = _json_response({
+            "data": [{"attributes": {"lei": "LEI001"}}],
+            "meta": {"pagination": {"currentPage": 1, "lastPage": 592, "perPage": 1, "total": 592}}
+        })
         mock_get.return_value = mock_response
 
-        self.searcher.search_entities("Bank", country_of_jurisdiction="us")
+        count = self.searcher.count_entities("Citibank", search_type="fulltext", country_of_jurisdiction="gb")
+
+        assert count == 592
+        mock_get.assert_called_once()
+        params = mock_get.call_args[1]["params"]
+        assert params["page[size]"] == 1
+        assert params["filter[fulltext]"] == "Citibank"
+        assert params["filter[entity.legalAddress.country]"] == "GB"
+
+    def test_count_entities_network_error(self, mock_get):
+        """Test a failed count request raises GLEIFNetworkError."""
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+
+        with pytest.raises(GLEIFNetworkError):
+            self.searcher.count_entities("Citibank")
+
+    def test_isin_page_requests_sparse_fieldset(self, mock_get, monkeypatch):
+        """Test ISIN pages ask only for the isin field, dropping it if rejected."""
+        monkeypatch.setattr(GLEIFSearcher, "_rejected_fieldsets", set())
+        mock_get.side_effect = iter([_rejected_response("fields[isins]"), self.EMPTY_RESPONSE])
+
+        self.searcher._fetch_isin_page("https://api.gleif.org/api/v1/lei-records/LEI001/isins", 1)
+
+        fields = [call[1]["params"].get("fields[isins]") for call in mock_get.call_args_list]
+        assert fields == ["isin", None]
+        # Search pages keep requesting their own fieldset
+        assert GLEIFSearcher._rejected_fieldsets == {"isins"}
+        assert "fields[lei-records]" in self.searcher._build_search_params("Bank", "name", None, 10, ("lei",))
 
-        call_args = mock_get.call_args
-        params = call_args[1]["params"]
-        self.assertIn("filter[entity.legalAddress.country]", params)
-        self.assertEqual(params["filter[entity.legalAddress.country]"], "US")
+    def test_isin_page_unrelated_rejection_raised(self, mock_get, monkeypatch):
+        """Test an ISIN page 400 for another parameter keeps the fieldset and is raised."""
+        monkeypatch.setattr(GLEIFSearcher, "_rejected_fieldsets", set())
+        mock_get.return_value = _rejected_response("page[number]")
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
+        with pytest.raises(requests.exceptions.HTTPError):
+            self.searcher._fetch_isin_page("https://api.gleif.org/api/v1/lei-records/LEI001/isins", 1)
+
+        mock_get.assert_called_once()
+        assert not GLEIFSearcher._rejected_fieldsets
+
+    def test_search_halves_rejected_page_size(self, mock_get):
+        """Test a rejected page size is halved and remembered."""
+        mock_get.side_effect = iter([_rejected_response("page[size]"), self.EMPTY_RESPONSE])
+
+        self.searcher.search_entities("Bank")
+
+        sizes = [call[1]["params"]["page[size]"] for call in mock_get.call_args_list]
+        assert sizes == [100, 50]
+        assert self.searcher.page_size == 50
+
+    @pytest.mark.slow
     def test_search_pagination(self, mock_get):
         """Test search handles pagination correctly."""
         # First page with 2 results, lastPage is False (there's a next page)
-        mock_response_1 = Mock()
-        mock_response_1.json.return_value = {
-            "data": [
-                {
-                    "attributes": {
-                        "lei": "LEI001",
-                        "entity": {
-                            "legalName": "Bank 1",
-                            "legalAddress": {"country": "GB"}
-                        },
-                        "registration": {}
-                    }
-                },
-                {
-                    "attributes": {
-                        "lei": "LEI002",
-                        "entity": {
-                            "legalName": "Bank 2",
-                            "legalAddress": {"country": "GB"}
-                        },
-                        "registration": {}
-                    }
-                }
-            ],
-            "meta": {"pagination": {"lastPage": 2, "page": 1}}
-        }
+        mock_response_1 = _json_response({
+            "data": [_RECORD_BANK_1, _RECORD_BANK_2],
+            "meta": {"pagination": {"perPage": 2, "lastPage": 2, "page": 1}}
+        })
 
         # Second page with 1 result, lastPage is 2 (which equals current page), so stop
-        mock_response_2 = Mock()
-        mock_response_2.json.return_value = {
-            "data": [
-                {
-                    "attributes": {
-                        "lei": "LEI003",
-                        "entity": {
-                            "legalName": "Bank 3",
-                            "legalAddress": {"country": "GB"}
-                        },
-                        "registration": {}
-                    }
-                }
-            ],
-            "meta": {"pagination": {"lastPage": 2, "page": 2}}
-        }
+        mock_response_2 = _json_response({
+            "data": [_RECORD_BANK_3],
+            "meta": {"pagination": {"perPage": 2, "lastPage": 2, "page": 2}}
+        })
 
-        mock_get.side_effect = [mock_response_1, mock_response_2]
+        mock_get.side_effect = iter([mock_response_1, mock_response_2])
 
         results = self.searcher.search_entities("Bank")
 
-        self.assertEqual(len(results), 3)
-        self.assertEqual(mock_get.call_count, 2)
+        assert len(results) == 3
+        assert mock_get.call_count == 2
+
+    def test_search_concurrent_pages_keep_page_order(self, mock_get):
+        """Test pages fetched concurrently are returned in page order."""
+        def fetch(url, params):
+            page = params["page[number]"]
+            response = _json_response({
+                "data": [{"attributes": {"lei": f"LEI00{page}", "entity": {}}}],
+                "meta": {"pagination": {"perPage": 1, "lastPage": 3}}
+            })
+            return response
+
+        mock_get.side_effect = fetch
+
+        results = self.searcher.search_entities("Bank")
+
+        assert [result["legal_entity_id"] for result in results] == ["LEI001", "LEI002", "LEI003"]
+        pages = sorted(call[1]["params"]["page[number]"] for call in mock_get.call_args_list)
+        assert pages == [1, 2, 3]
+
+    @patch('gleif_search.APIConfig.SEARCH_PAGE_WINDOW', 2)
+    def test_search_bounds_pages_in_flight(self, mock_get):
+        """Test only a window of pages is requested ahead of the consumer."""
+        def fetch(url, params):
+            page = params["page[number]"]
+            response = _json_response({
+                "data": [{"attributes": {"lei": f"LEI{page:03d}", "entity": {}}}],
+                "meta": {"pagination": {"perPage": 1, "lastPage": 50}}
+            })
+            return response
+
+        mock_get.side_effect = fetch
+
+        results = self.searcher.iter_entities("Bank")
+        assert next(results)["legal_entity_id"] == "LEI001"
+        results.close()
+
+        assert mock_get.call_count <= 3
+        assert len(self.searcher.search_entities("Bank")) == 50
+
+    def test_iter_entities_yields_lazily(self, mock_get):
+        """Test iter_entities sends no request until it is consumed."""
+        mock_response = _json_response({
+            "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+            "meta": {}
+        })
+        mock_get.return_value = mock_response
+
+        results = self.searcher.iter_entities("Bank")
+        mock_get.assert_not_called()
+
+        assert next(results)["legal_entity_id"] == "LEI001"
+        assert list(results) == []
+
+    def test_iter_entities_validates_immediately(self):
+        """Test invalid parameters raise before iteration starts."""
+        with pytest.raises(GLEIFValidationError):
+            self.searcher.iter_entities("Bank", search_type="invalid")
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
     def test_search_no_results(self, mock_get):
         """Test search handles no results gracefully."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "data": [],
-            "meta": {"pagination": {}}
-        }
-        mock_get.return_value = mock_response
+        mock_get.return_value = self.EMPTY_RESPONSE
 
         results = self.searcher.search_entities("NonexistentEntity12345")
 
-        self.assertEqual(len(results), 0)
+        assert len(results) == 0
 
     @patch('gleif_search.GLEIFSearcher._validate_search_params')
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
-    def test_search_validates_parameters(self, mock_get, mock_validate):
+    def test_search_validates_parameters(self, mock_validate, mock_get):
         """Test search calls parameter validation."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "data": [],
-            "meta": {"pagination": {"lastPage": True}}
-        }
-        mock_get.return_value = mock_response
+        mock_get.return_value = self.EMPTY_RESPONSE
 
         self.searcher.search_entities("Citibank", search_type="name", country_of_jurisdiction="US")
 
         # Verify validation was called
         mock_validate.assert_called_once()
         call_args = mock_validate.call_args[0]
-        self.assertEqual(call_args[0], "Citibank")
-        self.assertEqual(call_args[1], "name")
-        self.assertEqual(call_args[2], "US")
+        assert call_args[0] == "Citibank"
+        assert call_args[1] == "name"
+        assert call_args[2] == "US"
 
 
-class TestGLEIFSearcherPagination(unittest.TestCase):
+@pytest.mark.usefixtures("class_searcher")
+class TestGLEIFSearcherPagination:
     """Test pagination logic."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        self.searcher = GLEIFSearcher()
-
     def test_should_stop_pagination_not_at_last_page(self):
         """Test pagination continues when not at last page."""
         pagination = {"lastPage": 3, "page": 1}
         should_stop = GLEIFSearcher._should_stop_pagination(pagination, 1)
-        self.assertFalse(should_stop)
+        assert not should_stop
 
     def test_should_stop_pagination_at_last_page(self):
         """Test pagination stops when current page equals lastPage."""
         pagination = {"lastPage": 3, "page": 3}
         should_stop = GLEIFSearcher._should_stop_pagination(pagination, 3)
-        self.assertTrue(should_stop)
+        assert should_stop
+
+    def test_should_stop_pagination_past_last_page(self):
+        """Test pagination stops when the server reports a page beyond lastPage."""
+        pagination = {"lastPage": 3, "currentPage": 4}
+        should_stop = GLEIFSearcher._should_stop_pagination(pagination, 4)
+        assert should_stop
 
     def test_should_stop_pagination_before_last_page(self):
         """Test pagination continues before last page."""
         pagination = {"lastPage": 5, "page": 2}
         should_stop = GLEIFSearcher._should_stop_pagination(pagination, 2)
-        self.assertFalse(should_stop)
+        assert not should_stop
 
     def test_should_stop_pagination_missing_last_page(self):
         """Test pagination stops when lastPage is missing (None)."""
         pagination = {"page": 1}
         should_stop = GLEIFSearcher._should_stop_pagination(pagination, 1)
-        self.assertTrue(should_stop)
+        assert should_stop
+
+    def test_should_stop_pagination_short_page(self):
+        """Test pagination stops on a page smaller than the page size."""
+        pagination = {"lastPage": 3, "page": 1}
+        should_stop = GLEIFSearcher._should_stop_pagination(pagination, 1, 50, 100)
+        assert should_stop
+
+    def test_should_stop_pagination_full_page(self):
+        """Test a full page before lastPage continues pagination."""
+        pagination = {"perPage": 100, "lastPage": 3, "page": 1}
+        should_stop = GLEIFSearcher._should_stop_pagination(pagination, 1, 100, 200)
+        assert not should_stop
 
     def test_should_stop_pagination_empty_dict(self):
         """Test pagination stops with empty pagination dict."""
         pagination = {}
         should_stop = GLEIFSearcher._should_stop_pagination(pagination, 1)
-        self.assertTrue(should_stop)
+        assert should_stop
 
 
-class TestGLEIFSearcherErrorHandling(unittest.TestCase):
+class TestGLEIFSearcherErrorHandling:
     """Test error handling."""
 
-    def setUp(self):
+    def setup_method(self):
         """Set up test fixtures."""
         self.searcher = GLEIFSearcher()
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
     def test_search_network_error(self, mock_get):
         """Test search handles network errors gracefully."""
-        import requests
         mock_get.side_effect = requests.exceptions.ConnectionError("Network error")
 
         results = self.searcher.search_entities("Test")
 
-        self.assertEqual(len(results), 0)
+        assert len(results) == 0
+
+    def test_search_keeps_results_before_failed_page(self, mock_get):
+        """Test results from pages before a failed page are returned."""
+        def fetch(url, params):
+            if params["page[number]"] == 2:
+                raise requests.exceptions.ConnectionError("Network error")
+            response = _json_response({
+                "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+                "meta": {"pagination": {"perPage": 1, "lastPage": 3}}
+            })
+            return response
+
+        mock_get.side_effect = fetch
+
+        results = self.searcher.search_entities("Test")
+
+        assert [result["legal_entity_id"] for result in results] == ["LEI001"]
+
+    def test_resumable_search_raises_with_state(self, mock_get):
+        """Test a resumable search reports where to resume and what it got."""
+        def fetch(url, params):
+            if params["page[number]"] == 2:
+                raise requests.exceptions.ConnectionError("Network error")
+            response = _json_response({
+                "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+                "meta": {"pagination": {"perPage": 1, "lastPage": 3}}
+            })
+            return response
+
+        mock_get.side_effect = fetch
+
+        with pytest.raises(GLEIFResumableError) as ctx:
+            self.searcher.search_entities("Test", country_of_jurisdiction="gb", resume_state={})
+
+        assert ctx.value.next_page == 2
+        assert ctx.value.resume_state["next_page"] == 2
+        assert ctx.value.resume_state["country"] == "GB"
+        assert [r["legal_entity_id"] for r in ctx.value.partial] == ["LEI001"]
+
+    def test_resumable_search_raises_on_unparseable_page(self, mock_get):
+        """Test a page that is not valid JSON is resumable like a failed request."""
+        def fetch(url, params):
+            if params["page[number]"] == 2:
+                return Mock(spec=_RESPONSE_SPEC, content=b"not json")
+            return _json_response({
+                "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+                "meta": {"pagination": {"perPage": 1, "lastPage": 3}}
+            })
+
+        mock_get.side_effect = fetch
+
+        with pytest.raises(GLEIFResumableError) as ctx:
+            self.searcher.search_entities("Test", resume_state={})
+
+        assert ctx.value.next_page == 2
+        assert ctx.value.resume_state["next_page"] == 2
+        assert [r["legal_entity_id"] for r in ctx.value.partial] == ["LEI001"]
+
+    def test_cli_keeps_resume_file_until_search_completes(self, mock_get, tmp_path, monkeypatch, capsys):
+        """Test the CLI exits non-zero and saves its position when a page cannot be parsed."""
+        resume_file = tmp_path / "resume.json"
+        mock_get.return_value = Mock(spec=_RESPONSE_SPEC, content=b"not json")
+        monkeypatch.setattr(
+            "sys.argv", ["gleif_search.py", "Test", "--resume-file", str(resume_file)]
+        )
+
+        with pytest.raises(SystemExit) as ctx:
+            main()
+
+        assert ctx.value.code == 1
+        assert json_loads(resume_file.read_bytes())["next_page"] == 1
+        assert json_loads(capsys.readouterr().out)["results_count"] == 0
+
+    def test_resumed_search_starts_at_saved_page(self, mock_get):
+        """Test a resumed search requests only the pages it had not finished."""
+        mock_response = _json_response({
+            "data": [{"attributes": {"lei": "LEI002", "entity": {}}}],
+            "meta": {"pagination": {"perPage": 1, "lastPage": 3}}
+        })
+        mock_get.return_value = mock_response
+        state = {"query": "Test", "search_type": "name", "country": None,
+                 "page_size": 1, "next_page": 2}
+
+        results = self.searcher.search_entities("Test", resume_state=state)
+
+        assert len(results) == 2
+        pages = sorted(call[1]["params"]["page[number]"] for call in mock_get.call_args_list)
+        assert pages == [2, 3]
+        assert mock_get.call_args[1]["params"]["page[size]"] == 1
+
+    def test_resume_state_for_other_search_rejected(self):
+        """Test resume state from a different query is refused."""
+        state = {"query": "Other", "search_type": "name", "country": None, "next_page": 2}
+        with pytest.raises(GLEIFValidationError):
+            self.searcher.search_entities("Test", resume_state=state)
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
     def test_search_invalid_json(self, mock_get):
         """Test search handles invalid JSON responses."""
-        mock_response = Mock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
+        mock_response = Mock(spec=_RESPONSE_SPEC)
+        mock_response.content = b"not json"
         mock_get.return_value = mock_response
 
         results = self.searcher.search_entities("Test")
 
-        self.assertEqual(len(results), 0)
+        assert len(results) == 0
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
     def test_search_missing_data_key(self, mock_get):
         """Test search handles missing 'data' key in response."""
-        mock_response = Mock()
-        mock_response.json.return_value = {"meta": {}}
+        mock_response = _json_response({"meta": {}})
         mock_get.return_value = mock_response
 
         results = self.searcher.search_entities("Test")
 
-        self.assertEqual(len(results), 0)
+        assert len(results) == 0
 
     def test_validation_error_caught_in_search(self):
         """Test that validation errors are caught and handled."""
         # Trying to search with invalid parameters should raise GLEIFValidationError
-        with self.assertRaises(GLEIFValidationError):
+        with pytest.raises(GLEIFValidationError):
             self.searcher.search_entities("", search_type="name")
 
 
-class TestGLEIFSearcherInitialization(unittest.TestCase):
+class TestGLEIFSearcherInitialization:
     """Test searcher initialization."""
 
-    def test_init_default_values(self):
+    def test_init_default_values(self, default_searcher):
         """Test initialization with default values."""
-        searcher = GLEIFSearcher()
-        self.assertEqual(searcher.page_size, 100)
-        self.assertEqual(searcher.instrument_request_budget, 20)
-        self.assertEqual(searcher.max_retries, 3)
-        self.assertEqual(searcher.backoff_base_seconds, 0.5)
+        assert default_searcher.page_size == 200
+        assert default_searcher.instrument_request_budget == 20
+        assert default_searcher.max_retries == 3
+        assert default_searcher.backoff_base_seconds == 0.5
 
     def test_init_custom_page_size(self):
         """Test initialization with custom page size."""
         searcher = GLEIFSearcher(page_size=50)
-        self.assertEqual(searcher.page_size, 50)
-
-    def test_init_page_size_capped_at_100(self):
-        """Test page size is capped at 100."""
-        searcher = GLEIFSearcher(page_size=200)
-        self.assertEqual(searcher.page_size, 100)
+        assert searcher.page_size == 50
+
+    def test_init_page_size_capped_at_200(self):
+        """Test page size is capped at the API maximum of 200."""
+        searcher = GLEIFSearcher(page_size=500)
+        assert searcher.page_size == 200
+
+    def test_init_requests_compressed_json_api(self, default_searcher):
+        """Test the session asks for compressed JSON:API responses."""
+        assert default_searcher.session.headers["Accept"] == "application/vnd.api+json"
+        assert "gzip" in default_searcher.session.headers["Accept-Encoding"]
+
+    def test_init_pool_fits_concurrent_pages(self, default_searcher):
+        """Test the connection pool can serve every concurrent page worker."""
+        adapter = default_searcher.session.get_adapter("https://api.gleif.org")
+        assert adapter._pool_maxsize >= APIConfig.SEARCH_MAX_WORKERS
+
+    def test_init_adapter_retries_transient_failures(self):
+        """Test the adapter retries connection failures and rate-limit statuses."""
+        searcher = GLEIFSearcher(max_retries=2)
+        retry = searcher.session.get_adapter("https://api.gleif.org").max_retries
+        assert retry.total == 2
+        assert set(retry.status_forcelist) == set(APIConfig.RATE_LIMIT_CODES)
+        assert retry.respect_retry_after_header
+
+    def test_context_manager_closes_session(self):
+        """Test leaving the context manager closes a session no other searcher uses."""
+        # Retry settings no other test uses, so this searcher is the only user
+        searcher = GLEIFSearcher(backoff_base_seconds=0.125)
+        with patch.object(searcher.session, "close") as mock_close:
+            with searcher as entered:
+                assert entered is searcher
+            mock_close.assert_called_once()
+
+    def test_searchers_share_session(self):
+        """Test searchers with the same retry settings reuse one session."""
+        assert GLEIFSearcher().session is GLEIFSearcher().session
+        assert GLEIFSearcher(max_retries=1).session is not GLEIFSearcher(max_retries=2).session
+
+    def test_close_keeps_session_in_use(self):
+        """Test a shared session stays open until its last searcher is closed."""
+        first = GLEIFSearcher(backoff_base_seconds=0.25)
+        second = GLEIFSearcher(backoff_base_seconds=0.25)
+        with patch.object(first.session, "close") as mock_close:
+            first.close()
+            first.close()
+            mock_close.assert_not_called()
+            assert GLEIFSearcher(backoff_base_seconds=0.25).session is second.session
+
+    def test_closed_session_not_shared(self):
+        """Test a searcher created after the last close gets a fresh session."""
+        searcher = GLEIFSearcher(backoff_base_seconds=0.375)
+        searcher.close()
+        assert GLEIFSearcher(backoff_base_seconds=0.375).session is not searcher.session
+
+    def test_close_leaves_injected_session_open(self):
+        """Test an injected session is left for its owner to close."""
+        session = Mock()
+        GLEIFSearcher(session=session).close()
+        session.close.assert_not_called()
+
+    def test_init_uses_injected_session(self):
+        """Test an injected session replaces the shared one."""
+        session = Mock()
+        assert GLEIFSearcher(session=session).session is session
 
     def test_init_negative_values_handled(self):
         """Test negative values are converted to valid defaults."""
@@ -535,30 +837,277 @@ class TestGLEIFSearcherInitialization(unittest.TestCase):
             max_retries=-2,
             backoff_base_seconds=-0.5
         )
-        self.assertEqual(searcher.instrument_request_budget, 0)
-        self.assertEqual(searcher.max_retries, 0)
-        self.assertEqual(searcher.backoff_base_seconds, 0.0)
+        assert searcher.instrument_request_budget == 0
+        assert searcher.max_retries == 0
+        assert searcher.backoff_base_seconds == 0.0
 
 
-class TestFinancialInstrumentsExtraction(unittest.TestCase):
+class TestGetWithBackoff:
+    """Test requests sent through the retrying session."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.searcher = GLEIFSearcher(max_retries=2, backoff_base_seconds=1.0)
+
+    def test_get_sends_one_request_with_timeout(self):
+        """Test retries are left to the adapter rather than repeated here."""
+        response = Mock(status_code=429)
+        with patch.object(self.searcher.session, "send", return_value=response) as mock_send:
+            result = self.searcher._get_with_backoff("https://api.gleif.org/api/v1/lei-records", {"a": 1})
+
+        assert result is response
+        mock_send.assert_called_once()
+        assert mock_send.call_args[1]["timeout"] == APIConfig.TIMEOUT_SECONDS
+
+    def test_get_reuses_prepared_template(self):
+        """Test requests to one origin share a template but carry their own URL."""
+        with patch.object(self.searcher.session, "send") as mock_send, \
+                patch.object(self.searcher.session, "prepare_request",
+                             wraps=self.searcher.session.prepare_request) as mock_prepare:
+            self.searcher._get_with_backoff(
+                "https://api.gleif.org/api/v1/lei-records", {"page[number]": 1}
+            )
+            self.searcher._get_with_backoff(
+                "https://api.gleif.org/api/v1/lei-records/LEI001/isins", {"page[number]": 2}
+            )
+
+        assert mock_prepare.call_count == 1
+        first, second = [call[0][0] for call in mock_send.call_args_list]
+        assert first.url == "https://api.gleif.org/api/v1/lei-records?page%5Bnumber%5D=1"
+        assert second.url == (
+            "https://api.gleif.org/api/v1/lei-records/LEI001/isins?page%5Bnumber%5D=2"
+        )
+        assert second.headers["User-Agent"] == "GLEIF-Search-Tool/1.0"
+
+
+class TestSearchOverTransport:
+    """Test searches end to end through a session routed to canned responses."""
+
+    SEARCH_URL = "https://api.gleif.org/api/v1/lei-records"
+    ISIN_URL = "https://api.gleif.org/api/v1/lei-records/549300U8H3KN0K301B23/isins"
+
+    @classmethod
+    def setup_class(cls):
+        """Route the search endpoint to an empty result for the whole class."""
+        cls.adapter = _RoutedAdapter()
+        cls.adapter.add(cls.SEARCH_URL, {"data": [], "meta": {}})
+        cls.session = Session()
+        cls.session.mount("https://", cls.adapter)
+
+    @classmethod
+    def teardown_class(cls):
+        """Close the routed session."""
+        cls.session.close()
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.adapter.sent.clear()
+        self.searcher = GLEIFSearcher(session=self.session)
+
+    def teardown_method(self):
+        """Restore the class's canonical search response."""
+        self.adapter.add(self.SEARCH_URL, {"data": [], "meta": {}})
+
+    def test_search_sends_filters_in_query(self):
+        """Test the query and country filter reach the request URL."""
+        self.searcher.search_entities("Citibank", country_of_jurisdiction="gb")
+
+        request = self.adapter.sent[0]
+        query = parse_qs(urlsplit(request.url).query)
+        assert query["filter[entity.legalName]"] == ["Citibank"]
+        assert query["filter[entity.legalAddress.country]"] == ["GB"]
+        assert query["page[number]"] == ["1"]
+
+    def test_search_follows_isin_link(self):
+        """Test an instrument search requests the entity's related ISIN link."""
+        self.adapter.add(self.SEARCH_URL, {
+            "data": [{**_RECORD_CITIBANK, "relationships": {
+                "isins": {"links": {"related": self.ISIN_URL}}
+            }}],
+            "meta": {}
+        })
+        self.adapter.add(self.ISIN_URL, {"data": [{"attributes": {"isin": "US0000000001"}}], "meta": {}})
+
+        results = self.searcher.search_entities("Citibank", include_instruments=True)
+
+        assert results[0]["legal_entity_id"] == "549300U8H3KN0K301B23"
+        assert {"type": "ISIN", "value": "US0000000001"} in results[0]["tickers_and_instruments"]
+        assert urlsplit(self.adapter.sent[-1].url).path == urlsplit(self.ISIN_URL).path
+
+    def test_search_server_error_returns_no_results(self):
+        """Test an error status from the API is handled like a failed request."""
+        self.adapter.add(self.SEARCH_URL, {"errors": []}, status=500)
+
+        results = self.searcher.search_entities("Citibank")
+
+        assert results == []
+
+
+class TestResponseCache:
+    """Test caching of decoded API responses."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.searcher = GLEIFSearcher()
+        self.url = "https://api.gleif.org/api/v1/lei-records"
+        mock_response = _json_response({"data": []})
+        self.mock_response = mock_response
+
+    def test_repeated_request_served_from_cache(self, mock_get):
+        """Test an identical request within the TTL is not sent again."""
+        mock_get.return_value = self.mock_response
+
+        first = self.searcher._cached_json(self.url, {"a": 1, "b": 2}, ttl_seconds=60)
+        second = self.searcher._cached_json(self.url, {"b": 2, "a": 1}, ttl_seconds=60)
+
+        assert first is second
+        assert mock_get.call_count == 1
+
+    @patch('gleif_search.time.monotonic')
+    def test_expired_entry_refetched(self, mock_monotonic, mock_get):
+        """Test a response older than its TTL is requested again."""
+        mock_get.return_value = self.mock_response
+        mock_monotonic.side_effect = [0.0, 61.0]
+
+        self.searcher._cached_json(self.url, {"a": 1}, ttl_seconds=60)
+        self.searcher._cached_json(self.url, {"a": 1}, ttl_seconds=60)
+
+        assert mock_get.call_count == 2
+
+    @patch('gleif_search.APIConfig.RESPONSE_CACHE_MAXSIZE', 2)
+    def test_cache_evicts_least_recently_used(self, mock_get):
+        """Test the cache drops the least recently used entry when full."""
+        mock_get.return_value = self.mock_response
+
+        for page in (1, 2, 1, 3):
+            self.searcher._cached_json(self.url, {"page": page}, ttl_seconds=60)
+
+        cached_pages = [dict(key[1])["page"] for key in self.searcher._cache]
+        assert cached_pages == [1, 3]
+
+    def test_search_page_trimmed_before_caching(self, mock_get):
+        """Test cached search pages keep only the fields the extractors read."""
+        self.mock_response.content = json_dumps({
+            "data": [{
+                "type": "lei-records",
+                "id": "LEI001",
+                "attributes": {"lei": "LEI001", "entity": {}, "conformityFlag": "CONFORMING"},
+                "relationships": {
+                    "isins": {"links": {"related": "https://example.org/isins"}},
+                    "managing-lou": {"links": {"related": "https://example.org/lou"}}
+                },
+                "links": {"self": "https://example.org/LEI001"}
+            }],
+            "meta": {"goldenCopy": {}, "pagination": {"currentPage": 1, "lastPage": 1}},
+            "links": {"first": "https://example.org"}
+        })
+        mock_get.return_value = self.mock_response
+
+        page = self.searcher._fetch_search_page(self.url, {"page[size]": 1}, 1)
+
+        assert page == {
+            "data": [{
+                "attributes": {"lei": "LEI001", "entity": {}},
+                "relationships": {"isins": {"links": {"related": "https://example.org/isins"}}}
+            }],
+            "meta": {"pagination": {"currentPage": 1, "lastPage": 1}}
+        }
+
+    def test_only_first_search_page_cached(self, mock_get):
+        """Test later pages of a search are not kept in the response cache."""
+        def fetch(url, params):
+            page = params["page[number]"]
+            return _json_response({
+                "data": [{"attributes": {"lei": f"LEI00{page}", "entity": {}}}],
+                "meta": {"pagination": {"currentPage": page, "lastPage": 3, "perPage": 1}}
+            })
+
+        mock_get.side_effect = fetch
+
+        results = list(self.searcher.iter_entities("Bank"))
+
+        assert len(results) == 3
+        assert [dict(key[1])["page[number]"] for key in self.searcher._cache] == [1]
+
+    def test_repeated_search_served_from_cache(self, mock_get):
+        """Test an equivalent search returns a copy of the cached results."""
+        self.mock_response.content = json_dumps({
+            "data": [{"attributes": {"lei": "LEI001", "entity": {}}}],
+            "meta": {}
+        })
+        mock_get.return_value = self.mock_response
+
+        first = self.searcher.search_entities("Bank", country_of_jurisdiction="gb")
+        first[0]["legal_entity_id"] = "CHANGED"
+        second = self.searcher.search_entities("Bank", country_of_jurisdiction="GB")
+
+        assert second[0]["legal_entity_id"] == "LEI001"
+        assert mock_get.call_count == 1
+
+    def test_search_cache_keyed_on_query_sent(self, mock_get):
+        """Test queries differing in case are searched separately, as the API sees them."""
+        mock_get.return_value = self.mock_response
+
+        self.searcher.search_entities("Bank")
+        self.searcher.search_entities("bank")
+
+        sent = [call[1]["params"]["filter[entity.legalName]"] for call in mock_get.call_args_list]
+        assert sent == ["Bank", "bank"]
+
+    def test_failed_search_not_cached(self, mock_get):
+        """Test a search that stopped early is requested again."""
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+
+        self.searcher.search_entities("Bank")
+        self.searcher.search_entities("Bank")
+
+        assert mock_get.call_count == 2
+
+    def test_clear_cache(self, mock_get):
+        """Test clear_cache forces the next search to hit the API."""
+        mock_get.return_value = self.mock_response
+
+        self.searcher.search_entities("Bank")
+        self.searcher.clear_cache()
+        self.searcher.search_entities("Bank")
+
+        assert mock_get.call_count == 2
+
+
+class TestFinancialInstrumentsExtraction:
     """Test financial instruments extraction."""
 
-    def setUp(self):
+    def setup_method(self):
         """Set up test fixtures."""
         self.searcher = GLEIFSearcher()
 
+    def _instruments(self, record):
+        """Enrich a single record and return its tickers_and_instruments."""
+        entity_info = {"legal_entity_id": record["attributes"].get("lei")}
+        with ThreadPoolExecutor(max_workers=APIConfig.INSTRUMENT_MAX_WORKERS) as executor:
+            self.searcher._add_financial_instruments(executor, [(record, entity_info)])
+        return entity_info["tickers_and_instruments"]
+
     def test_extract_bic_only(self):
         """Test extraction of BIC code only."""
         record = {
             "attributes": {"bic": "CIUKGB2LXXX"},
             "relationships": {}
         }
-        result = self.searcher._extract_financial_instruments(record)
+        result = self._instruments(record)
         
-        self.assertIsNotNone(result)
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["type"], "BIC")
-        self.assertEqual(result[0]["value"], "CIUKGB2LXXX")
+        assert result is not None
+        assert len(result) == 1
+        assert result[0]["type"] == "BIC"
+        assert result[0]["value"] == "CIUKGB2LXXX"
+
+    def test_search_adds_instruments_when_requested(self, mock_get):
+        """Test an instrument search enriches each extracted record."""
+        mock_get.return_value = _json_response({"data": [_RECORD_TEST_BANK], "meta": {}})
+
+        results = self.searcher.search_entities("Test Bank", include_instruments=True)
+
+        assert results[0]["tickers_and_instruments"] == [{"type": "BIC", "value": "CIUKGB2LXXX"}]
 
     def test_extract_no_instruments(self):
         """Test extraction when no instruments are present."""
@@ -566,35 +1115,25 @@ class TestFinancialInstrumentsExtraction(unittest.TestCase):
             "attributes": {},
             "relationships": {}
         }
-        result = self.searcher._extract_financial_instruments(record)
-        self.assertIsNone(result)
+        result = self._instruments(record)
+        assert result is None
 
-    @patch('gleif_search.GLEIFSearcher._get_with_backoff')
+    @pytest.mark.slow
     def test_extract_isin_with_pagination(self, mock_get):
         """Test ISIN extraction with pagination."""
-        # First ISIN page, not last
-        isin_response_1 = Mock()
-        isin_response_1.json.return_value = {
-            "data": [
-                {
-                    "attributes": {"isin": "US1234567890"}
-                }
-            ],
-            "meta": {"pagination": {"lastPage": 2, "page": 1}}
-        }
-
-        # Second ISIN page, is last
-        isin_response_2 = Mock()
-        isin_response_2.json.return_value = {
-            "data": [
-                {
-                    "attributes": {"isin": "US9876543210"}
-                }
-            ],
-            "meta": {"pagination": {"lastPage": 2, "page": 2}}
-        }
-
-        mock_get.side_effect = [isin_response_1, isin_response_2]
+        def pages():
+            # One ISIN per page; only the second page is the last
+            for page, isin in ((1, "US1234567890"), (2, "US9876543210")):
+                yield SimpleNamespace(
+                    content=json_dumps({
+                        "data": [{"attributes": {"isin": isin}}],
+                        "meta": {"pagination": {"perPage": 1, "lastPage": 2, "page": page}}
+                    }),
+                    raise_for_status=lambda: None,
+                )
+
+        responses = pages()
+        mock_get.side_effect = lambda url, params: next(responses)
 
         record = {
             "attributes": {"bic": "TESTBIC123"},
@@ -604,14 +1143,174 @@ class TestFinancialInstrumentsExtraction(unittest.TestCase):
                 }
             }
         }
-        result = self.searcher._extract_financial_instruments(record)
+        result = self._instruments(record)
 
         # Should have 2 ISINs + BIC = 3 total
-        self.assertEqual(len(result), 3)
-        self.assertEqual(result[0]["type"], "ISIN")
-        self.assertEqual(result[1]["type"], "ISIN")
-        self.assertEqual(result[2]["type"], "BIC")
+        assert len(result) == 3
+        assert result[0]["type"] == "ISIN"
+        assert result[1]["type"] == "ISIN"
+        assert result[2]["type"] == "BIC"
+
+    def test_search_enrichment_shares_budget(self, mock_get):
+        """Test concurrent ISIN lookups for a page never exceed the budget."""
+        self.searcher = GLEIFSearcher(instrument_request_budget=1)
+
+        def fetch(url, params):
+            response = Mock(spec=_RESPONSE_SPEC)
+            if url.endswith("/isins"):
+                response.content = json_dumps({
+                    "data": [{"attributes": {"isin": "US0000000001"}}], "meta": {}
+                })
+            else:
+                response.content = json_dumps({
+                    "data": [
+                        {
+                            "attributes": {"lei": lei, "entity": {}},
+                            "relationships": {"isins": {"links": {
+                                "related": f"https://api.gleif.org/api/v1/lei-records/{lei}/isins"
+                            }}}
+                        }
+                        for lei in ("LEI001", "LEI002")
+                    ],
+                    "meta": {}
+                })
+            return response
+
+        mock_get.side_effect = fetch
+
+        results = self.searcher.search_entities("Bank", include_instruments=True)
+
+        assert [result["legal_entity_id"] for result in results] == ["LEI001", "LEI002"]
+        enriched = [result["tickers_and_instruments"] for result in results]
+        assert sorted(enriched, key=bool) == [None, [{"type": "ISIN", "value": "US0000000001"}]]
+        assert self.searcher.instrument_request_budget == 0
+
+    def test_search_enrichment_fetches_every_isin_page(self, mock_get):
+        """Test multi-page ISIN lists are assembled in page order for each record."""
+        isins = {
+            ("LEI001", 1): ["US0000000001", "US0000000002"],
+            ("LEI001", 2): ["US0000000003"],
+            ("LEI002", 1): ["GB0000000001"],
+        }
+
+        def fetch(url, params):
+            response = Mock(spec=_RESPONSE_SPEC)
+            if url.endswith("/isins"):
+                lei = url.split("/")[-2]
+                page = params["page[number]"]
+                response.content = json_dumps({
+                    "data": [{"attributes": {"isin": isin}} for isin in isins[(lei, page)]],
+                    "meta": {"pagination": {
+                        "currentPage": page,
+                        "lastPage": 2 if lei == "LEI001" else 1,
+                        "perPage": 2,
+                    }}
+                })
+            else:
+                response.content = json_dumps({
+                    "data": [
+                        {
+                            "attributes": {"lei": lei, "entity": {}},
+                            "relationships": {"isins": {"links": {
+                                "related": f"https://api.gleif.org/api/v1/lei-records/{lei}/isins"
+                            }}}
+                        }
+                        for lei in ("LEI001", "LEI002")
+                    ],
+                    "meta": {}
+                })
+            return response
+
+        mock_get.side_effect = fetch
+
+        results = self.searcher.search_entities("Bank", include_instruments=True)
+
+        assert [[i["value"] for i in result["tickers_and_instruments"]] for result in results] == [
+            ["US0000000001", "US0000000002", "US0000000003"], ["GB0000000001"]
+        ]
+        assert self.searcher.instrument_request_budget == APIConfig.DEFAULT_INSTRUMENT_BUDGET - 3
+
+    def test_search_with_failed_isin_lookup_not_cached(self, mock_get):
+        """Test a search whose instrument lookup failed is enriched again when repeated."""
+        def fetch(url, params):
+            if url.endswith("/isins"):
+                raise requests.exceptions.ConnectionError("down")
+            return _json_response({
+                "data": [{
+                    "attributes": {"lei": "LEI001", "entity": {}},
+                    "relationships": {"isins": {"links": {
+                        "related": "https://api.gleif.org/api/v1/lei-records/LEI001/isins"
+                    }}}
+                }],
+                "meta": {}
+            })
+
+        mock_get.side_effect = fetch
+
+        self.searcher.search_entities("Bank", include_instruments=True)
+        self.searcher.search_entities("Bank", include_instruments=True)
+
+        isin_calls = [call for call in mock_get.call_args_list if call[0][0].endswith("/isins")]
+        assert len(isin_calls) == 2
+
+    def test_isins_reused_across_searches(self, mock_get):
+        """Test an entity's ISINs are fetched once for overlapping searches."""
+        def fetch(url, params):
+            response = Mock(spec=_RESPONSE_SPEC)
+            if url.endswith("/isins"):
+                response.content = json_dumps({
+                    "data": [{"attributes": {"isin": "US0000000001"}}], "meta": {}
+                })
+            else:
+                response.content = json_dumps({
+                    "data": [{
+                        "attributes": {"lei": "LEI001", "entity": {}},
+                        "relationships": {"isins": {"links": {
+                            "related": "https://api.gleif.org/api/v1/lei-records/LEI001/isins"
+                        }}}
+                    }],
+                    "meta": {}
+                })
+            return response
+
+        mock_get.side_effect = fetch
+
+        first = self.searcher.search_entities("Citibank", include_instruments=True)
+        second = self.searcher.search_entities("Citi", include_instruments=True)
+        direct = self._instruments({
+            "attributes": {"lei": "LEI001"},
+            "relationships": {"isins": {"links": {
+                "related": "https://api.gleif.org/api/v1/lei-records/LEI001/isins"
+            }}}
+        })
+
+        expected = [{"type": "ISIN", "value": "US0000000001"}]
+        assert first[0]["tickers_and_instruments"] == expected
+        assert second[0]["tickers_and_instruments"] == expected
+        assert direct == expected
+        isin_calls = [call for call in mock_get.call_args_list if call[0][0].endswith("/isins")]
+        assert len(isin_calls) == 1
+        assert self.searcher.instrument_request_budget == APIConfig.DEFAULT_INSTRUMENT_BUDGET - 1
+
+
+class TestSearchOutput:
+    """Test the CLI's incrementally encoded JSON document."""
+
+    def test_output_matches_single_pass_encoding(self):
+        """Test the written document equals encoding the whole output at once."""
+        header = {"query": "Citi", "search_type": "name", "country_filter": None}
+        for results in ([{"legal_entity_id": "LEI001", "address": {"city": "London"}}, {"x": []}], []):
+            stream = io.BytesIO()
+            _write_search_output(
+                stream,
+                {**header, "results_count": len(results)},
+                [_encode_result(result) for result in results],
+            )
+            expected = json_dumps(
+                {**header, "results_count": len(results), "results": results}, indent=True
+            ) + b"\n"
+            assert stream.getvalue() == expected
 
 
 if __name__ == "__main__":
-    unittest.main()
+    raise SystemExit(pytest.main([__file__]))